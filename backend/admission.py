@@ -0,0 +1,141 @@
+from starlette.responses import JSONResponse
+from typing import Dict, Tuple
+import math
+import os
+import time
+
+# Separate budgets: cheap catalog/quiz traffic and expensive LLM-backed routes
+READ_RATE = float(os.environ.get('ADMISSION_READ_RATE', 20))
+READ_BURST = float(os.environ.get('ADMISSION_READ_BURST', 40))
+AI_RATE = float(os.environ.get('ADMISSION_AI_RATE', 0.1))
+AI_BURST = float(os.environ.get('ADMISSION_AI_BURST', 3))
+
+# Past this many in-flight LLM requests per worker, new AI requests are shed
+LLM_INFLIGHT_LIMIT = int(os.environ.get('ADMISSION_LLM_INFLIGHT_LIMIT', 8))
+SHED_RETRY_AFTER_SECONDS = int(os.environ.get('ADMISSION_SHED_RETRY_AFTER', 5))
+TRUST_FORWARDED_FOR = os.environ.get('ADMISSION_TRUST_FORWARDED_FOR', 'false').lower() == 'true'
+MAX_TRACKED_CLIENTS = int(os.environ.get('ADMISSION_MAX_CLIENTS', 100000))
+
+# Health probes must keep working while clients are being throttled
+EXEMPT_ROUTES = {"/api/health"}
+
+# Mock interview practice is not listed: its grader has its own bounded queue and
+# falls back to instant heuristic scoring when saturated, so it never needs shedding
+AI_ROUTES = {
+    "/api/analyze-resume",
+    "/api/analyze-resume/stream",
+}
+
+
+class TokenBuckets:
+    """Token buckets for many clients, one (tokens, updated_at) tuple each.
+
+    A bucket that has refilled completely is indistinguishable from a new one,
+    so idle clients are dropped when the table grows past its limit.
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = MAX_TRACKED_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.buckets: Dict[str, Tuple[float, float]] = {}
+        self._next_sweep = 0.0
+
+    def take(self, client: str, now: float) -> float:
+        """Consumes one token; returns 0 if admitted, otherwise seconds until a token is available."""
+        tokens, updated_at = self.buckets.get(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+        if tokens < 1:
+            self.buckets[client] = (tokens, now)
+            return (1 - tokens) / self.rate
+        self.buckets[client] = (tokens - 1, now)
+        if len(self.buckets) > self.max_clients and now >= self._next_sweep:
+            self._sweep(now)
+        return 0.0
+
+    def _sweep(self, now: float):
+        full_after = self.burst / self.rate
+        # If every tracked client is active, avoid rescanning the table on each request
+        self._next_sweep = now + 1
+        self.buckets = {
+            client: bucket for client, bucket in self.buckets.items()
+            if now - bucket[1] < full_after
+        }
+
+
+def _too_many_requests(detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        {"detail": detail},
+        status_code=429,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class AdmissionController:
+    """Per-worker admission state: client budgets and the in-flight LLM request count."""
+
+    def __init__(self):
+        self.read_buckets = TokenBuckets(READ_RATE, READ_BURST)
+        self.ai_buckets = TokenBuckets(AI_RATE, AI_BURST)
+        self.llm_inflight = 0
+        self.stats = {"rate_limited": 0, "shed": 0}
+
+    def status(self) -> dict:
+        return {
+            **self.stats,
+            "llm_inflight": self.llm_inflight,
+            "llm_inflight_limit": LLM_INFLIGHT_LIMIT,
+            "tracked_clients": len(self.read_buckets.buckets) + len(self.ai_buckets.buckets),
+        }
+
+
+def _client(scope) -> str:
+    if TRUST_FORWARDED_FOR:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class AdmissionControlMiddleware:
+    """Rejects requests over a client's budget, and sheds AI requests when the LLM backlog is full.
+
+    Runs before the request body is read, so rejected uploads are never buffered.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in EXEMPT_ROUTES:
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller
+        is_ai = scope["path"].rstrip("/") in AI_ROUTES
+        if is_ai and controller.llm_inflight >= LLM_INFLIGHT_LIMIT:
+            controller.stats["shed"] += 1
+            response = _too_many_requests("AI service is busy, please retry shortly", SHED_RETRY_AFTER_SECONDS)
+            await response(scope, receive, send)
+            return
+
+        buckets = controller.ai_buckets if is_ai else controller.read_buckets
+        retry_after = buckets.take(_client(scope), time.monotonic())
+        if retry_after:
+            controller.stats["rate_limited"] += 1
+            response = _too_many_requests("Too many requests", retry_after)
+            await response(scope, receive, send)
+            return
+
+        if not is_ai:
+            await self.app(scope, receive, send)
+            return
+
+        # Counted until the response, including any streamed body, has been sent
+        controller.llm_inflight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.llm_inflight -= 1
@@ -0,0 +1,370 @@
+from collections import defaultdict
+from pymongo.errors import OperationFailure, PyMongoError
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+import os
+import time
+
+from catalog_snapshot import merge_snapshot, read_snapshot
+from tenancy import MAX_CACHED_TENANTS, TENANT_FIELD, TenantLRU, tenant_of
+
+logger = logging.getLogger(__name__)
+
+CATALOG_COLLECTIONS = ("quizzes", "roadmaps", "mock_interviews")
+
+# Used only when change streams are unavailable (e.g. a standalone mongod)
+FALLBACK_TTL_SECONDS = float(os.environ.get('CATALOG_CACHE_TTL_SECONDS', '60'))
+RECONNECT_DELAY_SECONDS = 1.0
+# How soon a collection served from stale data retries MongoDB
+DEGRADED_RETRY_SECONDS = 5.0
+SNAPSHOT_INTERVAL_SECONDS = float(os.environ.get('CATALOG_SNAPSHOT_INTERVAL_SECONDS', '30'))
+MAX_RECONNECT_DELAY_SECONDS = 30.0
+
+# Server error codes that mean change streams will never work on this deployment
+CHANGE_STREAMS_UNSUPPORTED = {40573, 40324}
+CHANGE_STREAM_HISTORY_LOST = 286
+
+
+class _Partition:
+    """Cached documents of one collection for one tenant."""
+
+    __slots__ = ("docs", "by_id", "loaded", "loaded_at", "lock", "refresh")
+
+    def __init__(self):
+        self.docs: Dict[object, dict] = {}
+        self.by_id: Dict[str, dict] = {}
+        # loaded stays set after an invalidation; loaded_at is cleared by it
+        self.loaded = False
+        self.loaded_at: Optional[float] = None
+        self.lock = asyncio.Lock()
+        # Background reload of a degraded partition, so reads never wait on MongoDB being down
+        self.refresh: Optional[asyncio.Task] = None
+
+    def replace(self, documents: List[dict]):
+        self.loaded = True
+        self.docs = {doc["_id"]: doc for doc in documents}
+        self.by_id = {doc["id"]: doc for doc in documents if "id" in doc}
+
+    def add(self, doc: dict):
+        self.docs[doc["_id"]] = doc
+        if "id" in doc:
+            self.by_id[doc["id"]] = doc
+
+    def remove(self, key) -> Optional[dict]:
+        previous = self.docs.pop(key, None)
+        if previous is not None and "id" in previous:
+            self.by_id.pop(previous["id"], None)
+        return previous
+
+
+class CatalogCache:
+    """Per-worker copy of the catalog collections, partitioned by tenant.
+
+    Entries are kept coherent by a change stream when the deployment supports
+    one; otherwise each collection is reloaded once its TTL expires. The last
+    known contents are also written to a local snapshot, so a worker can boot
+    and keep serving reads while MongoDB is unreachable (degraded mode).
+
+    Each tenant's collections are loaded with a tenant-scoped query and held
+    in their own partitions; past MAX_CACHED_TENANTS the least recently used
+    tenant is evicted as a whole.
+    """
+
+    def __init__(self, db, collections=CATALOG_COLLECTIONS, snapshot_path: Optional[Path] = None, max_tenants: int = MAX_CACHED_TENANTS):
+        self.db = db
+        self.collections = collections
+        self.snapshot_path = snapshot_path
+        self.snapshot_version: Optional[str] = None
+        # (tenant, collection) pairs currently served from stale data
+        self.degraded: Set[Tuple[str, str]] = set()
+        self._changes = 0
+        self._snapshot_changes = 0
+        # Tenants with unrecoverable stale data are never evicted
+        self._tenants = TenantLRU(
+            max_tenants,
+            pinned=lambda tenant, _: any(key[0] == tenant for key in self.degraded),
+            on_evict=self._evicted,
+        )
+        self.ttl_seconds: Optional[float] = None
+        self.resume_token = None
+        self.watching = False
+        self._task: Optional[asyncio.Task] = None
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._listeners = []
+
+    def add_listener(self, listener):
+        """Registers an object with catalog_reloaded(tenant, name, documents),
+        catalog_changed(tenant, name, old, new) and catalog_evicted(tenant)."""
+        self._listeners.append(listener)
+
+    def _evicted(self, tenant: str, _partitions):
+        logger.info("Evicted tenant %s from the catalog cache", tenant)
+        for listener in self._listeners:
+            listener.catalog_evicted(tenant)
+
+    def _partition(self, tenant: str, name: str) -> _Partition:
+        partitions = self._tenants.get(tenant)
+        if partitions is None:
+            partitions = {collection: _Partition() for collection in self.collections}
+            self._tenants.set(tenant, partitions)
+        return partitions[name]
+
+    def _loaded_partition(self, tenant: str, name: str) -> Optional[_Partition]:
+        partitions = self._tenants.peek(tenant)
+        if partitions is None or partitions[name].loaded_at is None:
+            return None
+        return partitions[name]
+
+    def _reloaded(self, tenant: str, name: str, documents: List[dict]):
+        self._partition(tenant, name).replace(documents)
+        for listener in self._listeners:
+            listener.catalog_reloaded(tenant, name, documents)
+
+    def _is_fresh(self, tenant: str, name: str, partition: _Partition) -> bool:
+        if partition.loaded_at is None:
+            return False
+        ttl = DEGRADED_RETRY_SECONDS if (tenant, name) in self.degraded else self.ttl_seconds
+        if ttl is None:
+            return True
+        return time.monotonic() - partition.loaded_at < ttl
+
+    async def _load(self, tenant: str, name: str, partition: _Partition):
+        async with partition.lock:
+            if self._is_fresh(tenant, name, partition):
+                return
+            try:
+                documents = await self.db[name].find({TENANT_FIELD: tenant}).to_list(None)
+            except PyMongoError as e:
+                if not partition.loaded:
+                    raise
+                # Keep serving the last known contents and retry shortly
+                logger.warning("Serving cached %s/%s while MongoDB is unavailable: %s", tenant, name, e)
+                self.degraded.add((tenant, name))
+                partition.loaded_at = time.monotonic()
+                return
+            self.degraded.discard((tenant, name))
+            self._changes += 1
+            self._reloaded(tenant, name, documents)
+            partition.loaded_at = time.monotonic()
+
+    async def _refresh(self, tenant: str, name: str, partition: _Partition):
+        try:
+            await self._load(tenant, name, partition)
+        except PyMongoError as e:
+            logger.warning("Could not refresh %s/%s: %s", tenant, name, e)
+
+    async def _fresh_partition(self, tenant: str, name: str) -> _Partition:
+        partition = self._partition(tenant, name)
+        if self._is_fresh(tenant, name, partition):
+            return partition
+        if (tenant, name) in self.degraded:
+            # A retry would block for the whole server selection timeout; serve the stale copy meanwhile
+            if partition.refresh is None or partition.refresh.done():
+                partition.refresh = asyncio.create_task(self._refresh(tenant, name, partition))
+            return partition
+        await self._load(tenant, name, partition)
+        return partition
+
+    async def ensure_loaded(self, tenant: str, name: str):
+        """Loads or refreshes a collection, e.g. for its listeners, without copying its documents."""
+        await self._fresh_partition(tenant, name)
+
+    async def documents(self, tenant: str, name: str) -> List[dict]:
+        partition = await self._fresh_partition(tenant, name)
+        return list(partition.docs.values())
+
+    async def get(self, tenant: str, name: str, doc_id: str) -> Optional[dict]:
+        partition = await self._fresh_partition(tenant, name)
+        return partition.by_id.get(doc_id)
+
+    async def find_one(self, tenant: str, name: str, field: str, value) -> Optional[dict]:
+        for doc in await self.documents(tenant, name):
+            if doc.get(field) == value:
+                return doc
+        return None
+
+    def invalidate(self, name: Optional[str] = None, tenant: Optional[str] = None):
+        # Cached documents stay around as the fallback for degraded reads
+        for cached_tenant, partitions in self._tenants.items():
+            if tenant and cached_tenant != tenant:
+                continue
+            for collection in ([name] if name else self.collections):
+                partitions[collection].loaded_at = None
+
+    def warm_start(self) -> bool:
+        """Fills the cache from the local snapshot without touching MongoDB."""
+        if not self.snapshot_path:
+            return False
+        header, collections = read_snapshot(self.snapshot_path)
+        if not header:
+            return False
+        by_tenant: Dict[Tuple[str, str], List[dict]] = defaultdict(list)
+        for name in self.collections:
+            for doc in collections.get(name, ()):
+                by_tenant[(tenant_of(doc), name)].append(doc)
+        now = time.monotonic()
+        for (tenant, name), documents in by_tenant.items():
+            self._reloaded(tenant, name, documents)
+            self._partition(tenant, name).loaded_at = now
+        self.snapshot_version = header["version"]
+        logger.info("Catalog warm-started from snapshot %s", self.snapshot_version)
+        return True
+
+    @property
+    def read_only(self) -> bool:
+        return bool(self.degraded)
+
+    async def save_snapshot(self):
+        if self.degraded or self._snapshot_changes == self._changes:
+            return
+        changes = self._changes
+        # Only partitions this worker holds fresh data for; the rest of the file is kept as it is
+        partitions = {
+            (tenant, name): list(partition.docs.values())
+            for tenant, tenant_partitions in self._tenants.items()
+            for name, partition in tenant_partitions.items()
+            if partition.loaded_at is not None
+        }
+        if not partitions:
+            return
+        version = await asyncio.to_thread(merge_snapshot, self.snapshot_path, partitions)
+        if version:
+            self.snapshot_version = version
+            logger.info("Wrote catalog snapshot %s", version)
+        self._snapshot_changes = changes
+
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(SNAPSHOT_INTERVAL_SECONDS)
+            try:
+                await self.save_snapshot()
+            except (PyMongoError, OSError) as e:
+                logger.warning("Could not write catalog snapshot: %s", e)
+
+    def _owner(self, name: str, key) -> Optional[str]:
+        for tenant, partitions in self._tenants.items():
+            if partitions[name].loaded_at is not None and key in partitions[name].docs:
+                return tenant
+        return None
+
+    def _notify_changed(self, tenant: str, name: str, old: Optional[dict], new: Optional[dict]):
+        for listener in self._listeners:
+            listener.catalog_changed(tenant, name, old, new)
+
+    def apply_change(self, change: dict):
+        name = change.get("ns", {}).get("coll")
+        operation = change["operationType"]
+
+        if operation in ("drop", "rename", "dropDatabase", "invalidate"):
+            self.invalidate(name if operation in ("drop", "rename") else None)
+            return
+        if name not in self.collections:
+            return
+
+        document = None
+        if operation in ("insert", "replace", "update"):
+            # fullDocument is missing if the document was deleted before the update lookup
+            document = change.get("fullDocument")
+        key = change["documentKey"]["_id"]
+
+        # Delete events carry no document, so the owning tenant is looked up in the cache
+        owner = self._owner(name, key)
+        target = self._loaded_partition(tenant_of(document), name) if document is not None else None
+        if owner is None and target is None:
+            # Nothing cached for this tenant yet; the next read loads the current state
+            return
+        self._changes += 1
+
+        previous = None
+        if owner is not None:
+            previous = self._tenants.peek(owner)[name].remove(key)
+            if target is None or owner != tenant_of(document):
+                self._notify_changed(owner, name, previous, None)
+                previous = None
+        if target is not None:
+            target.add(document)
+            self._notify_changed(tenant_of(document), name, previous, document)
+
+    async def _watch(self):
+        delay = RECONNECT_DELAY_SECONDS
+        pipeline = [{"$match": {"ns.coll": {"$in": list(self.collections)}}}]
+
+        while True:
+            try:
+                async with self.db.watch(
+                    pipeline,
+                    full_document="updateLookup",
+                    resume_after=self.resume_token,
+                ) as stream:
+                    if self.resume_token is None:
+                        # Without a resume point, anything cached may have missed events
+                        self.invalidate()
+                    self.watching = True
+                    self.ttl_seconds = None
+                    delay = RECONNECT_DELAY_SECONDS
+                    async for change in stream:
+                        self.apply_change(change)
+                        if change["operationType"] == "invalidate":
+                            # The server rejects resuming after an invalidate event; open a new stream
+                            self.resume_token = None
+                            break
+                        self.resume_token = stream.resume_token
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAMS_UNSUPPORTED:
+                    logger.info("Change streams unavailable, catalog cache falls back to a %ss TTL", FALLBACK_TTL_SECONDS)
+                    self.watching = False
+                    self.ttl_seconds = FALLBACK_TTL_SECONDS
+                    return
+                if e.code == CHANGE_STREAM_HISTORY_LOST:
+                    self.resume_token = None
+                logger.warning("Catalog change stream failed: %s", e)
+            except PyMongoError as e:
+                logger.warning("Catalog change stream disconnected: %s", e)
+
+            # Serve with a TTL while reconnecting so cached data cannot stay stale indefinitely
+            self.watching = False
+            self.ttl_seconds = FALLBACK_TTL_SECONDS
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY_SECONDS)
+
+    def start(self):
+        # Until the stream is confirmed open, behave like the TTL fallback
+        self.ttl_seconds = FALLBACK_TTL_SECONDS
+        self._task = asyncio.create_task(self._watch())
+        if self.snapshot_path:
+            self._snapshot_task = asyncio.create_task(self._snapshot_loop())
+
+    async def stop(self):
+        refreshes = [
+            partition.refresh
+            for _, partitions in self._tenants.items()
+            for partition in partitions.values()
+            if partition.refresh is not None
+        ]
+        for task in [self._task, self._snapshot_task] + refreshes:
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._snapshot_task = None
+
+    def status(self) -> dict:
+        return {
+            "mode": "change_stream" if self.watching else "ttl",
+            "ttl_seconds": self.ttl_seconds,
+            "read_only": self.read_only,
+            "degraded": sorted(f"{tenant}/{name}" for tenant, name in self.degraded),
+            "snapshot_version": self.snapshot_version,
+            "max_tenants": self._tenants.max_tenants,
+            "cached": {
+                tenant: {name: len(partition.docs) for name, partition in partitions.items()}
+                for tenant, partitions in self._tenants.items()
+            },
+        }
@@ -0,0 +1,103 @@
+import bson
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import fcntl
+import hashlib
+import logging
+import os
+
+from tenancy import tenant_of
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+
+
+def data_version(collections: Dict[str, List[dict]]) -> str:
+    """Content digest of the catalog, independent of document order."""
+    digest = hashlib.sha1()
+    for name in sorted(collections):
+        digest.update(name.encode())
+        for doc in sorted(collections[name], key=lambda d: str(d["_id"])):
+            digest.update(bson.encode(doc))
+    return digest.hexdigest()
+
+
+def read_header(path: Path) -> Optional[dict]:
+    try:
+        with open(path, "rb") as f:
+            return next(bson.decode_file_iter(f), None)
+    except (OSError, bson.errors.BSONError):
+        return None
+
+
+def write_snapshot(path: Path, collections: Dict[str, List[dict]]) -> Optional[str]:
+    """Writes the catalog as a stream of BSON documents: one header, then one entry per document.
+
+    Returns the new data version, or None when the file already holds it.
+    """
+    version = data_version(collections)
+    header = read_header(path)
+    if header and header.get("version") == version:
+        return None
+
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(bson.encode({
+            "format": SNAPSHOT_FORMAT,
+            "version": version,
+            "created_at": datetime.utcnow(),
+            "counts": {name: len(docs) for name, docs in collections.items()},
+        }))
+        for name, docs in collections.items():
+            for doc in docs:
+                f.write(bson.encode({"c": name, "d": doc}))
+    # Atomic so concurrent workers and readers never see a partial file
+    os.replace(tmp_path, path)
+    return version
+
+
+def read_snapshot(path: Path) -> Tuple[Optional[dict], Dict[str, List[dict]]]:
+    collections: Dict[str, List[dict]] = {}
+    try:
+        with open(path, "rb") as f:
+            entries = bson.decode_file_iter(f)
+            header = next(entries, None)
+            if not header or header.get("format") != SNAPSHOT_FORMAT:
+                return None, {}
+            for name in header["counts"]:
+                collections[name] = []
+            for entry in entries:
+                collections[entry["c"]].append(entry["d"])
+    except FileNotFoundError:
+        return None, {}
+    except (OSError, KeyError, bson.errors.BSONError) as e:
+        logger.warning("Ignoring unreadable catalog snapshot %s: %s", path, e)
+        return None, {}
+    return header, collections
+
+
+def merge_snapshot(path: Path, partitions: Dict[Tuple[str, str], List[dict]]) -> Optional[str]:
+    """Replaces the given (tenant, collection) partitions in the snapshot, keeping all others.
+
+    Every worker writes the same file but caches a different set of tenants,
+    so a worker never drops data it has not loaded itself. A lock file
+    serialises the read-merge-write of concurrent workers.
+    """
+    with open(path.with_name(f"{path.name}.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            _, existing = read_snapshot(path)
+            merged: Dict[Tuple[str, str], List[dict]] = {}
+            for name, docs in existing.items():
+                for doc in docs:
+                    merged.setdefault((tenant_of(doc), name), []).append(doc)
+            merged.update(partitions)
+
+            collections: Dict[str, List[dict]] = {}
+            for (_, name), docs in merged.items():
+                collections.setdefault(name, []).extend(docs)
+            return write_snapshot(path, collections)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
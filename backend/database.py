@@ -0,0 +1,170 @@
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.read_preferences import Primary, SecondaryPreferred
+from pymongo.write_concern import WriteConcern
+from pydantic import BaseModel
+from typing import List, Optional
+import os
+import threading
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_list(name: str) -> List[str]:
+    value = os.environ.get(name, "")
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+class DatabaseSettings(BaseModel):
+    mongo_url: str
+    db_name: str
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    wait_queue_timeout_ms: Optional[int] = None
+    server_selection_timeout_ms: int = 30000
+    compressors: List[str] = []
+    catalog_read_preference: str = "primary"
+    analytics_read_preference: str = "primary"
+    status_checks_write_w: int = 1
+
+    @classmethod
+    def from_env(cls) -> "DatabaseSettings":
+        return cls(
+            mongo_url=os.environ['MONGO_URL'],
+            db_name=os.environ['DB_NAME'],
+            max_pool_size=_env_int('MONGO_MAX_POOL_SIZE', 100),
+            min_pool_size=_env_int('MONGO_MIN_POOL_SIZE', 0),
+            wait_queue_timeout_ms=_env_int('MONGO_WAIT_QUEUE_TIMEOUT_MS', 0) or None,
+            server_selection_timeout_ms=_env_int('MONGO_SERVER_SELECTION_TIMEOUT_MS', 30000),
+            compressors=_env_list('MONGO_COMPRESSORS'),
+            catalog_read_preference=os.environ.get('MONGO_CATALOG_READ_PREFERENCE', 'primary'),
+            analytics_read_preference=os.environ.get('MONGO_ANALYTICS_READ_PREFERENCE', 'primary'),
+            status_checks_write_w=_env_int('MONGO_STATUS_CHECKS_WRITE_W', 1),
+        )
+
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "secondaryPreferred": SecondaryPreferred,
+}
+
+
+def read_preference(name: str):
+    if name not in READ_PREFERENCES:
+        raise ValueError(f"Unsupported read preference: {name}")
+    return READ_PREFERENCES[name]()
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks open and checked-out connections across all server pools."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open_connections = 0
+        self.checked_out = 0
+        self.checkout_failures = 0
+
+    def _add(self, field: str, delta: int):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + delta)
+
+    def connection_created(self, event):
+        self._add("open_connections", 1)
+
+    def connection_closed(self, event):
+        self._add("open_connections", -1)
+
+    def connection_checked_out(self, event):
+        self._add("checked_out", 1)
+
+    def connection_checked_in(self, event):
+        self._add("checked_out", -1)
+
+    def connection_check_out_failed(self, event):
+        self._add("checkout_failures", 1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def snapshot(self, max_pool_size: int) -> dict:
+        with self._lock:
+            return {
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+                "checkout_failures": self.checkout_failures,
+                "max_pool_size": max_pool_size,
+                "utilization": round(self.checked_out / max_pool_size, 3) if max_pool_size else 0.0,
+            }
+
+
+settings = DatabaseSettings.from_env()
+pool_monitor = PoolMonitor()
+
+client_options = {
+    "maxPoolSize": settings.max_pool_size,
+    "minPoolSize": settings.min_pool_size,
+    "serverSelectionTimeoutMS": settings.server_selection_timeout_ms,
+    "event_listeners": [pool_monitor],
+}
+if settings.wait_queue_timeout_ms:
+    client_options["waitQueueTimeoutMS"] = settings.wait_queue_timeout_ms
+if settings.compressors:
+    client_options["compressors"] = settings.compressors
+
+client = AsyncIOMotorClient(settings.mongo_url, **client_options)
+
+# Writes and read-your-own-writes queries go through the primary
+db = client[settings.db_name]
+
+# Catalog data (quizzes, roadmaps, mock interviews) tolerates slightly stale reads
+catalog_db = client.get_database(
+    settings.db_name,
+    read_preference=read_preference(settings.catalog_read_preference),
+)
+
+# Counters and aggregates for /api/stats
+analytics_db = client.get_database(
+    settings.db_name,
+    read_preference=read_preference(settings.analytics_read_preference),
+)
+
+status_checks_collection = db.get_collection(
+    "status_checks",
+    write_concern=WriteConcern(w=settings.status_checks_write_w),
+)
+
+
+async def database_health() -> dict:
+    try:
+        await client.admin.command("ping")
+        reachable = True
+    except Exception:
+        reachable = False
+
+    return {
+        "database": "ok" if reachable else "unreachable",
+        "pool": pool_monitor.snapshot(settings.max_pool_size),
+    }
@@ -0,0 +1,201 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import uuid
+
+from llm import llm_chat_module
+
+logger = logging.getLogger(__name__)
+
+GRADING_WORKERS = int(os.environ.get('GRADING_WORKERS', 2))
+GRADING_QUEUE_SIZE = int(os.environ.get('GRADING_QUEUE_SIZE', 32))
+GRADING_TIMEOUT_SECONDS = float(os.environ.get('GRADING_TIMEOUT_SECONDS', 20))
+GRADING_CACHE_SIZE = int(os.environ.get('GRADING_CACHE_SIZE', 10000))
+# Longer answers are graded on their beginning, so one practice cannot make an arbitrarily large prompt
+MAX_ANSWER_CHARS = int(os.environ.get('GRADING_MAX_ANSWER_CHARS', 2000))
+
+GRADING_SYSTEM_MESSAGE = "You are an experienced technical interviewer grading a student's mock interview answers. Be specific and constructive."
+
+GRADING_PROMPT = """
+        Grade each answer below for a {role} interview. For every item give:
+        - index: the item number shown
+        - score: integer (0-100) for correctness, depth and communication
+        - feedback: one or two sentences of specific, actionable feedback
+
+        Respond only with a JSON array of objects with these keys.
+
+        {items}
+        """
+
+
+class GradingUnavailable(Exception):
+    pass
+
+
+def heuristic_grade(user_responses: List[str]) -> Tuple[int, str]:
+    # Simple scoring based on response length and completeness
+    total_score = 0
+    for response in user_responses:
+        if len(response.strip()) > 50:  # Decent length response
+            total_score += 15
+        elif len(response.strip()) > 20:  # Short but adequate
+            total_score += 10
+        else:  # Very short response
+            total_score += 5
+
+    # Cap the score at 100
+    final_score = min(total_score, 100)
+
+    # Generate feedback based on score
+    if final_score >= 90:
+        feedback = "Excellent responses! You demonstrated strong knowledge and communication skills. Keep up the great work!"
+    elif final_score >= 70:
+        feedback = "Good responses overall. Consider providing more specific examples and details to strengthen your answers."
+    elif final_score >= 50:
+        feedback = "Decent effort. Focus on expanding your answers with more concrete examples and technical details."
+    else:
+        feedback = "Your responses need more depth. Practice explaining concepts clearly and provide specific examples from your experience."
+
+    return final_score, feedback
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def answer_key(question: str, response: str) -> str:
+    return hashlib.sha256(f"{_normalize(question)}\x1f{_normalize(response)}".encode()).hexdigest()
+
+
+def _parse_grades(response: str, count: int) -> Dict[int, dict]:
+    start, end = response.find("["), response.rfind("]")
+    if start == -1 or end < start:
+        raise ValueError("No JSON array in grading response")
+    grades = {}
+    for item in json.loads(response[start:end + 1]):
+        index = int(item["index"])
+        if 1 <= index <= count:
+            grades[index - 1] = {
+                "score": max(0, min(100, int(item["score"]))),
+                "feedback": str(item["feedback"]).strip(),
+            }
+    return grades
+
+
+class InterviewGrader:
+    """Grades a practice's answers with one batched LLM prompt.
+
+    Jobs go through a bounded queue served by a fixed number of workers.
+    Per-answer grades are cached by a hash of the normalised question and
+    response, so only uncached answers are sent to the model. grade()
+    raises GradingUnavailable when the queue is full or the grade does not
+    arrive in time; the caller then falls back to heuristic_grade().
+    """
+
+    def __init__(self, api_key: Optional[str], model: str):
+        self.api_key = api_key
+        self.model = model
+        self.cache: "OrderedDict[str, dict]" = OrderedDict()
+        self.queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self.stats = {"llm_calls": 0, "cache_hits": 0, "saturated": 0, "timeouts": 0, "failures": 0}
+
+    def start(self):
+        if not self.api_key:
+            return
+        self.queue = asyncio.Queue(maxsize=GRADING_QUEUE_SIZE)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(GRADING_WORKERS)]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def _cached(self, key: str) -> Optional[dict]:
+        grade = self.cache.get(key)
+        if grade is not None:
+            self.cache.move_to_end(key)
+        return grade
+
+    def _remember(self, key: str, grade: dict):
+        self.cache[key] = grade
+        self.cache.move_to_end(key)
+        if len(self.cache) > GRADING_CACHE_SIZE:
+            self.cache.popitem(last=False)
+
+    async def _grade_batch(self, role: str, pairs: List[Tuple[str, str]]) -> Dict[int, dict]:
+        items = "\n".join(
+            f"{i}. Question: {question}\n           Answer: {response}"
+            for i, (question, response) in enumerate(pairs, start=1)
+        )
+        llm = llm_chat_module()
+        chat = llm.LlmChat(
+            api_key=self.api_key,
+            session_id=str(uuid.uuid4()),
+            system_message=GRADING_SYSTEM_MESSAGE
+        ).with_model("gemini", self.model)
+        self.stats["llm_calls"] += 1
+        response = await chat.send_message(llm.UserMessage(text=GRADING_PROMPT.format(role=role, items=items)))
+        return _parse_grades(response, len(pairs))
+
+    async def _worker(self):
+        while True:
+            role, pairs, keys, future = await self.queue.get()
+            try:
+                grades = await self._grade_batch(role, pairs)
+                for index, grade in grades.items():
+                    self._remember(keys[index], grade)
+                if not future.done():
+                    future.set_result(grades)
+            except Exception as e:
+                self.stats["failures"] += 1
+                logger.warning("Interview grading failed: %s", e)
+                if not future.done():
+                    future.set_exception(GradingUnavailable(str(e)))
+            finally:
+                self.queue.task_done()
+
+    async def grade(self, role: str, questions: List[str], user_responses: List[str]) -> List[dict]:
+        """Returns one {"question", "score", "feedback"} entry per response."""
+        if self.queue is None:
+            raise GradingUnavailable("AI grading is not configured")
+        if len(user_responses) > len(questions):
+            # Answers without a question are left to the heuristic rather than sent to the model
+            raise GradingUnavailable("More answers than questions")
+
+        pairs = [(question, response[:MAX_ANSWER_CHARS]) for question, response in zip(questions, user_responses)]
+        keys = [answer_key(question, response) for question, response in pairs]
+        grades: List[Optional[dict]] = [self._cached(key) for key in keys]
+        self.stats["cache_hits"] += sum(grade is not None for grade in grades)
+
+        missing = [i for i, grade in enumerate(grades) if grade is None]
+        if missing:
+            future = asyncio.get_running_loop().create_future()
+            # Mark failures as retrieved even if this request has already given up on them
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            try:
+                self.queue.put_nowait((role, [pairs[i] for i in missing], [keys[i] for i in missing], future))
+            except asyncio.QueueFull:
+                self.stats["saturated"] += 1
+                raise GradingUnavailable("Grading pool is saturated")
+            try:
+                # shield() lets a late result still land in the cache for the next attempt
+                batch = await asyncio.wait_for(asyncio.shield(future), GRADING_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                raise GradingUnavailable("Grading timed out")
+            for position, index in enumerate(missing):
+                grades[index] = batch.get(position)
+
+        if any(grade is None for grade in grades):
+            raise GradingUnavailable("Grading response was incomplete")
+        return [
+            {"question": question, "score": grade["score"], "feedback": grade["feedback"]}
+            for (question, _), grade in zip(pairs, grades)
+        ]
@@ -0,0 +1,232 @@
+from collections import OrderedDict
+from datetime import datetime
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import PyMongoError
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import time
+
+from tenancy import TENANT_FIELD, drop_index_if_exists
+
+logger = logging.getLogger(__name__)
+
+TOP_K = int(os.environ.get('LEADERBOARD_TOP_K', 100))
+REFRESH_INTERVAL_SECONDS = float(os.environ.get('LEADERBOARD_REFRESH_SECONDS', 30))
+# Boards kept in memory (and refreshed) at most, and how long an unviewed board stays
+MAX_BOARDS = int(os.environ.get('LEADERBOARD_MAX_BOARDS', 256))
+BOARD_IDLE_SECONDS = float(os.environ.get('LEADERBOARD_IDLE_SECONDS', 600))
+GLOBAL_BOARD = "global"
+
+# Every metric is a stored field, so each has an index-backed sort order. Points are a
+# counter maintained with $inc; accuracy and average score are recomputed from the
+# counters after each write, and stay null until a user has enough results to rank.
+# A perfect interview practice (100) is worth as much as ten correct quiz answers.
+METRICS = {
+    "overall": "points",
+    "quiz": "quiz_accuracy",
+    "interview": "interview_average",
+}
+POINTS_PER_CORRECT_ANSWER = 10
+MIN_QUIZ_ATTEMPTS = int(os.environ.get('LEADERBOARD_MIN_QUIZ_ATTEMPTS', 10))
+MIN_INTERVIEW_PRACTICES = int(os.environ.get('LEADERBOARD_MIN_INTERVIEW_PRACTICES', 3))
+
+# Indexes on the counters the quiz and interview boards used to rank by
+LEGACY_INDEXES = ("tenant_1_board_1_quiz_correct_-1", "tenant_1_board_1_interview_score_total_-1")
+
+
+def _ratio(numerator: str, denominator: str, minimum: int, digits: int) -> dict:
+    return {"$cond": [
+        {"$gte": [{"$ifNull": [f"${denominator}", 0]}, minimum]},
+        {"$round": [{"$divide": [f"${numerator}", f"${denominator}"]}, digits]},
+        None,
+    ]}
+
+
+# Pipeline update deriving the rankable ratios from the counters
+DERIVED_FIELDS = [{"$set": {
+    "quiz_accuracy": _ratio("quiz_correct", "quiz_attempts", MIN_QUIZ_ATTEMPTS, 4),
+    "interview_average": _ratio("interview_score_total", "interview_count", MIN_INTERVIEW_PRACTICES, 2),
+}}]
+
+ENTRY_PROJECTION = {
+    "_id": 0,
+    "user_id": 1,
+    "points": 1,
+    "quiz_attempts": 1,
+    "quiz_correct": 1,
+    "interview_count": 1,
+    "interview_score_total": 1,
+    "quiz_accuracy": 1,
+    "interview_average": 1,
+}
+
+
+def cohort_board(cohort: str) -> str:
+    return f"cohort:{cohort}"
+
+
+def _entry(rank: Optional[int], doc: dict, field: str) -> dict:
+    attempts = doc.get("quiz_attempts", 0)
+    practices = doc.get("interview_count", 0)
+    return {
+        "rank": rank,
+        "user_id": doc["user_id"],
+        "value": doc.get(field, 0) if field == "points" else doc.get(field),
+        "quiz_attempts": attempts,
+        "quiz_accuracy": round(doc.get("quiz_correct", 0) / attempts, 3) if attempts else None,
+        "interview_count": practices,
+        "interview_average": round(doc.get("interview_score_total", 0) / practices, 1) if practices else None,
+    }
+
+
+class Leaderboards:
+    """Global and per-cohort leaderboards over quiz and interview results.
+
+    Each quiz attempt or interview practice bumps the user's aggregate row in
+    user_scores (one per board) with $inc upserts, then recomputes the row's
+    quiz accuracy and average interview score from its counters. The top TOP_K of every
+    board and metric is read through a (board, metric) index and kept in
+    memory, refreshed in the background for boards viewed recently (at most
+    MAX_BOARDS, least recently viewed evicted first).
+    Ranks outside the top-k come from an index range count. Boards belong to
+    a tenant, which leads every index and query.
+    """
+
+    def __init__(self, db):
+        self.collection = db.user_scores
+        self.top: Dict[Tuple[str, str, str], List[dict]] = {}
+        self.viewed_at: "OrderedDict[Tuple[str, str, str], float]" = OrderedDict()
+        self.refreshed_at: Dict[Tuple[str, str, str], datetime] = {}
+        self._ranks: Dict[Tuple[str, str, str], Dict[str, int]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure_indexes(self):
+        # Indexes from before tenants existed
+        await drop_index_if_exists(self.collection, "board_1_user_id_1")
+        for field in ("points", "quiz_correct", "interview_score_total"):
+            await drop_index_if_exists(self.collection, f"board_1_{field}_-1")
+        for name in LEGACY_INDEXES:
+            await drop_index_if_exists(self.collection, name)
+        # Rows written before the ratios were stored; once their index exists there are none left
+        if f"{TENANT_FIELD}_1_board_1_quiz_accuracy_-1" not in await self.collection.index_information():
+            await self.collection.update_many({"quiz_accuracy": {"$exists": False}}, DERIVED_FIELDS)
+
+        await self.collection.create_index(
+            [(TENANT_FIELD, ASCENDING), ("board", ASCENDING), ("user_id", ASCENDING)],
+            unique=True,
+        )
+        for field in METRICS.values():
+            await self.collection.create_index([(TENANT_FIELD, ASCENDING), ("board", ASCENDING), (field, DESCENDING)])
+
+    async def _increment(self, tenant: str, user_id: str, cohort: Optional[str], counters: dict):
+        boards = [GLOBAL_BOARD] + ([cohort_board(cohort)] if cohort else [])
+        operations = []
+        for board in boards:
+            row = {TENANT_FIELD: tenant, "board": board, "user_id": user_id}
+            # The ratios are recomputed from the counters as they are after the $inc
+            operations.append(UpdateOne(row, {"$inc": counters}, upsert=True))
+            operations.append(UpdateOne(row, DERIVED_FIELDS))
+        await self.collection.bulk_write(operations)
+
+    async def record_quiz(self, tenant: str, user_id: str, cohort: Optional[str], is_correct: bool):
+        await self._increment(tenant, user_id, cohort, {
+            "quiz_attempts": 1,
+            "quiz_correct": int(is_correct),
+            "points": POINTS_PER_CORRECT_ANSWER * int(is_correct),
+        })
+
+    async def record_interview(self, tenant: str, user_id: str, cohort: Optional[str], score: int):
+        await self._increment(tenant, user_id, cohort, {
+            "interview_count": 1,
+            "interview_score_total": score,
+            "points": score,
+        })
+
+    async def refresh(self, tenant: str, board: str, metric: str):
+        field = METRICS[metric]
+        query = {TENANT_FIELD: tenant, "board": board, field: {"$ne": None}}
+        cursor = self.collection.find(query, ENTRY_PROJECTION).sort(field, DESCENDING).limit(TOP_K)
+        docs = await cursor.to_list(TOP_K)
+
+        # Competition ranking: equal values share a rank
+        entries = []
+        for position, doc in enumerate(docs, start=1):
+            tied = entries and entries[-1]["value"] == doc.get(field, 0)
+            entries.append(_entry(entries[-1]["rank"] if tied else position, doc, field))
+
+        key = (tenant, board, metric)
+        self.top[key] = entries
+        self._ranks[key] = {entry["user_id"]: entry["rank"] for entry in entries}
+        self.refreshed_at[key] = datetime.utcnow()
+
+    async def leaderboard(self, tenant: str, board: str, metric: str, limit: int) -> dict:
+        key = (tenant, board, metric)
+        if key not in self.top:
+            # First view of this board; the background loop keeps it fresh while it is being viewed
+            await self.refresh(tenant, board, metric)
+        self.viewed_at[key] = time.monotonic()
+        self.viewed_at.move_to_end(key)
+        self._evict()
+        return {
+            "board": board,
+            "metric": metric,
+            "refreshed_at": self.refreshed_at[key],
+            "entries": self.top[key][:limit],
+        }
+
+    async def rank(self, tenant: str, user_id: str, board: str, metric: str) -> Optional[dict]:
+        field = METRICS[metric]
+        doc = await self.collection.find_one({TENANT_FIELD: tenant, "board": board, "user_id": user_id}, ENTRY_PROJECTION)
+        if not doc:
+            return None
+        value = doc.get(field, 0)
+        cached = self._ranks.get((tenant, board, metric), {}).get(user_id)
+        if value is None:
+            # Not enough results yet to be ranked on this metric
+            rank = None
+        elif cached is not None:
+            rank = cached
+        else:
+            rank = await self.collection.count_documents({TENANT_FIELD: tenant, "board": board, field: {"$gt": value}}) + 1
+        return {"board": board, "metric": metric, **_entry(rank, doc, field)}
+
+    def _drop(self, key: Tuple[str, str, str]):
+        self.top.pop(key, None)
+        self.refreshed_at.pop(key, None)
+        self._ranks.pop(key, None)
+        self.viewed_at.pop(key, None)
+
+    def _evict(self, now: Optional[float] = None):
+        while len(self.viewed_at) > MAX_BOARDS:
+            self._drop(next(iter(self.viewed_at)))
+        if now is not None:
+            idle = [key for key, viewed_at in self.viewed_at.items() if now - viewed_at > BOARD_IDLE_SECONDS]
+            for key in idle:
+                self._drop(key)
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(REFRESH_INTERVAL_SECONDS)
+            self._evict(time.monotonic())
+            for tenant, board, metric in list(self.top):
+                if (tenant, board, metric) not in self.viewed_at:
+                    # Evicted while an earlier refresh was in flight
+                    continue
+                try:
+                    await self.refresh(tenant, board, metric)
+                except PyMongoError as e:
+                    logger.warning("Could not refresh leaderboard %s/%s/%s: %s", tenant, board, metric, e)
+
+    def start(self):
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,17 @@
+from functools import lru_cache
+import time
+
+from startup import startup_report
+
+
+@lru_cache(maxsize=None)
+def llm_chat_module():
+    """Imports emergentintegrations on first use.
+
+    The integration pulls in a large dependency tree that workers serving only
+    quiz and catalog traffic never need, so it is kept off the startup path.
+    """
+    started = time.perf_counter()
+    from emergentintegrations.llm import chat
+    startup_report["lazy_import.emergentintegrations"] = round((time.perf_counter() - started) * 1000, 2)
+    return chat
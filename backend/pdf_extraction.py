@@ -0,0 +1,179 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from pydantic import BaseModel
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MAX_PDF_BYTES = int(os.environ.get('RESUME_MAX_PDF_BYTES', 5 * 1024 * 1024))
+MAX_PDF_PAGES = int(os.environ.get('RESUME_MAX_PDF_PAGES', 10))
+MAX_TEXT_CHARS = int(os.environ.get('RESUME_MAX_TEXT_CHARS', 20000))
+# Below this much text the PDF is probably scanned images, so the LLM needs the file itself
+MIN_TEXT_CHARS = 200
+PDF_FALLBACK_ENABLED = os.environ.get('RESUME_PDF_FALLBACK', 'true').lower() == 'true'
+EXTRACTION_WORKERS = int(os.environ.get('RESUME_EXTRACTION_WORKERS', 2))
+EXTRACTION_TIMEOUT_SECONDS = float(os.environ.get('RESUME_EXTRACTION_TIMEOUT_SECONDS', 15))
+
+# Rough token accounting: Gemini bills each PDF page as an image on top of its text
+TOKENS_PER_PDF_PAGE = 258
+CHARS_PER_TOKEN = 4
+
+
+class ResumeRejected(Exception):
+    pass
+
+
+class ExtractedResume(BaseModel):
+    text: str
+    pages: int
+    extraction_ms: float
+    use_pdf: bool = False
+
+    @property
+    def text_tokens(self) -> int:
+        return len(self.text) // CHARS_PER_TOKEN
+
+    @property
+    def tokens_saved(self) -> int:
+        if self.use_pdf:
+            return 0
+        return max(0, self.pages * TOKENS_PER_PDF_PAGE - self.text_tokens)
+
+
+def normalize_text(text: str) -> str:
+    text = text.replace("\x00", "")
+    # Re-join words hyphenated across line breaks
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+    text = re.sub(r"[ \t\r\f\v]+", " ", text)
+    text = re.sub(r" ?\n ?", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def _extract(content: bytes):
+    # Runs in a worker process; returns plain values so results pickle cheaply
+    from pypdf import PdfReader
+
+    try:
+        reader = PdfReader(io.BytesIO(content))
+        if reader.is_encrypted:
+            return "encrypted", None, 0
+        pages = len(reader.pages)
+        if pages > MAX_PDF_PAGES:
+            return "too_many_pages", None, pages
+        text = "\n".join(page.extract_text() or "" for page in reader.pages)
+    except Exception:
+        # pypdf raises a variety of errors on malformed files
+        return "unreadable", None, 0
+    return "ok", normalize_text(text)[:MAX_TEXT_CHARS], pages
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Forking this process would copy the state of motor's background threads into the workers
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=EXTRACTION_WORKERS, mp_context=multiprocessing.get_context(method))
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Replaces a stuck or broken pool; the next extraction starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    # A worker stuck in pypdf never returns, and the executor has no public way to stop it
+    for process in list((pool._processes or {}).values()):
+        process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+# Running totals reported by /api/health
+extraction_stats = {
+    "documents": 0,
+    "pdf_fallbacks": 0,
+    "rejected": 0,
+    "extraction_ms_total": 0.0,
+    "tokens_saved_total": 0,
+}
+
+
+async def extract_resume(content: bytes) -> ExtractedResume:
+    """Validates an uploaded resume and extracts its text off the event loop.
+
+    Raises ResumeRejected for documents that should never reach the LLM.
+    """
+    if not content:
+        extraction_stats["rejected"] += 1
+        raise ResumeRejected("The uploaded PDF is empty")
+    if len(content) > MAX_PDF_BYTES:
+        extraction_stats["rejected"] += 1
+        raise ResumeRejected(f"The uploaded PDF exceeds {MAX_PDF_BYTES // (1024 * 1024)} MB")
+
+    started = time.perf_counter()
+    pool = _executor()
+    try:
+        status, text, pages = await asyncio.wait_for(
+            asyncio.get_running_loop().run_in_executor(pool, _extract, content),
+            EXTRACTION_TIMEOUT_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        logger.warning("PDF extraction timed out after %ss, restarting the extraction pool", EXTRACTION_TIMEOUT_SECONDS)
+        _discard_pool(pool)
+        extraction_stats["rejected"] += 1
+        raise ResumeRejected("The uploaded PDF took too long to process")
+    except BrokenProcessPool:
+        # A worker died (e.g. out of memory on a decompression bomb); uploads in flight on the pool fail with it
+        logger.warning("PDF extraction worker died, restarting the extraction pool")
+        _discard_pool(pool)
+        extraction_stats["rejected"] += 1
+        raise ResumeRejected("The uploaded PDF could not be processed")
+    extraction_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    if status == "encrypted":
+        extraction_stats["rejected"] += 1
+        raise ResumeRejected("Password-protected PDFs are not supported")
+    if status == "too_many_pages":
+        extraction_stats["rejected"] += 1
+        raise ResumeRejected(f"Resumes are limited to {MAX_PDF_PAGES} pages")
+    if status == "unreadable":
+        extraction_stats["rejected"] += 1
+        raise ResumeRejected("The uploaded file is not a readable PDF")
+
+    use_pdf = len(text) < MIN_TEXT_CHARS
+    if use_pdf and not PDF_FALLBACK_ENABLED:
+        extraction_stats["rejected"] += 1
+        raise ResumeRejected("No readable text found in the PDF")
+
+    result = ExtractedResume(text=text or "", pages=pages, extraction_ms=extraction_ms, use_pdf=use_pdf)
+    extraction_stats["documents"] += 1
+    extraction_stats["pdf_fallbacks"] += int(use_pdf)
+    extraction_stats["extraction_ms_total"] = round(extraction_stats["extraction_ms_total"] + extraction_ms, 2)
+    extraction_stats["tokens_saved_total"] += result.tokens_saved
+    logger.info(
+        "Extracted resume: %d pages, %d chars in %.1f ms (pdf fallback: %s, ~%d tokens saved)",
+        pages, len(result.text), extraction_ms, use_pdf, result.tokens_saved,
+    )
+    return result
@@ -0,0 +1,236 @@
+from itertools import islice
+from pathlib import Path
+from pydantic import BaseModel, ValidationError
+from pymongo import ASCENDING, UpdateOne
+from typing import IO, Iterator, List, Optional, Tuple
+import asyncio
+import codecs
+import csv
+import hashlib
+import json
+import logging
+import re
+import time
+import uuid
+
+import typer
+
+from tenancy import DEFAULT_TENANT, TENANT_FIELD, drop_index_if_exists
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+QUIZ_FIELDS = ("question", "options", "correct_answer", "explanation", "category", "difficulty")
+QUESTION_HASH_INDEX = f"{TENANT_FIELD}_1_question_hash_1"
+
+
+class ImportReport(BaseModel):
+    rows_read: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    errors: List[str] = []
+    seconds: float = 0.0
+    rows_per_second: float = 0.0
+
+
+def question_hash(question: str) -> str:
+    normalized = re.sub(r"\s+", " ", question).strip().lower().rstrip("?.! ")
+    return hashlib.sha1(normalized.encode()).hexdigest()
+
+
+def quiz_hash_field(quiz: dict) -> dict:
+    """Fields stored with every quiz besides the model's, e.g. for seeded quizzes."""
+    return {"question_hash": question_hash(quiz["question"])}
+
+
+def detect_format(filename: str) -> str:
+    suffix = Path(filename).suffix.lower()
+    if suffix == ".csv":
+        return "csv"
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Unsupported quiz file type: {suffix or filename}")
+
+
+def _csv_options(row: dict):
+    # Either an "options" column (JSON array or pipe-separated) or option_1..option_N columns
+    value = row.pop("options", None)
+    if value:
+        value = value.strip()
+        return json.loads(value) if value.startswith("[") else [part.strip() for part in value.split("|")]
+    numbered = sorted((key for key in row if key and key.startswith("option_")), key=lambda key: int(key[7:]))
+    values = [row.pop(key) for key in numbered]
+    return [value for value in values if value]
+
+
+def iter_rows(stream: IO[bytes], fmt: str) -> Iterator[Tuple[int, object]]:
+    """Yields (line number, raw row) pairs without reading the whole file."""
+    text = codecs.getreader("utf-8-sig")(stream)
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            try:
+                row["options"] = _csv_options(row)
+            except ValueError as e:
+                yield reader.line_num, e
+                continue
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as e:
+                yield line_number, e
+
+
+class QuizImporter:
+    """Streams quiz rows into the quizzes collection in fixed-size batches.
+
+    Rows are validated against the Quiz model and deduplicated on a hash of the
+    normalised question text within the tenant. Each batch is written with one unordered
+    bulk_write of upserts, and the next batch is parsed while it is in
+    flight. Memory use depends on the batch size, not the file size.
+    """
+
+    def __init__(self, collection, model, tenant: str = DEFAULT_TENANT, batch_size: int = BATCH_SIZE):
+        self.collection = collection
+        self.model = model
+        self.tenant = tenant
+        self.batch_size = batch_size
+
+    async def ensure_indexes(self):
+        # The backfill and dedupe scan the whole collection, so they only run until the
+        # unique index exists; from then on it keeps duplicates out, and every writer
+        # (imports and seeding) stores the hash
+        if QUESTION_HASH_INDEX in await self.collection.index_information():
+            return
+
+        # Backfill hashes for quizzes created before imports existed
+        missing = self.collection.find({"question_hash": {"$exists": False}}, {"_id": 1, "question": 1})
+        updates = [
+            UpdateOne({"_id": doc["_id"]}, {"$set": {"question_hash": question_hash(doc["question"])}})
+            async for doc in missing
+        ]
+        if updates:
+            await self.collection.bulk_write(updates, ordered=False)
+        await self._remove_duplicates()
+        # Tenants may share questions, so uniqueness is per tenant
+        await drop_index_if_exists(self.collection, "question_hash_1")
+        await self.collection.create_index(
+            [(TENANT_FIELD, ASCENDING), ("question_hash", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"question_hash": {"$exists": True}},
+        )
+
+    async def _remove_duplicates(self):
+        # Older racing seeders could insert the same quiz twice; keep the seeded copy (or the oldest)
+        groups = self.collection.aggregate([
+            {"$match": {"question_hash": {"$exists": True}}},
+            {"$sort": {"_id": 1}},
+            {"$group": {
+                "_id": {"tenant": f"${TENANT_FIELD}", "question_hash": "$question_hash"},
+                "rows": {"$push": {"_id": "$_id", "seeded": {"$ne": [{"$ifNull": ["$seed_id", None]}, None]}}},
+            }},
+            {"$match": {"rows.1": {"$exists": True}}},
+        ])
+        duplicates = []
+        async for group in groups:
+            rows = group["rows"]
+            keep = next((row for row in rows if row["seeded"]), rows[0])
+            duplicates.extend(row["_id"] for row in rows if row is not keep)
+        if duplicates:
+            await self.collection.delete_many({"_id": {"$in": duplicates}})
+            logger.warning("Removed %d duplicate quizzes before indexing question hashes", len(duplicates))
+
+    def _prepare(self, batch, report: ImportReport) -> List[UpdateOne]:
+        operations = {}
+        for line_number, row in batch:
+            report.rows_read += 1
+            try:
+                if isinstance(row, Exception):
+                    raise row
+                quiz = self.model(**row)
+            except (ValidationError, ValueError, TypeError) as e:
+                report.invalid += 1
+                if len(report.errors) < MAX_REPORTED_ERRORS:
+                    report.errors.append(f"line {line_number}: {str(e).splitlines()[0]}")
+                continue
+
+            key = question_hash(quiz.question)
+            if key in operations:
+                report.duplicates += 1
+            fields = quiz.dict(include=set(QUIZ_FIELDS))
+            operations[key] = UpdateOne(
+                {TENANT_FIELD: self.tenant, "question_hash": key},
+                {
+                    "$set": {**fields, "question_hash": key},
+                    "$setOnInsert": {"id": str(uuid.uuid4())},
+                },
+                upsert=True,
+            )
+        return list(operations.values())
+
+    async def _write(self, operations: List[UpdateOne], report: ImportReport):
+        if not operations:
+            return
+        result = await self.collection.bulk_write(operations, ordered=False)
+        report.inserted += result.upserted_count
+        report.updated += result.modified_count
+        report.unchanged += result.matched_count - result.modified_count
+
+    async def run(self, rows: Iterator[Tuple[int, object]]) -> ImportReport:
+        report = ImportReport()
+        started = time.perf_counter()
+        pending: Optional[asyncio.Task] = None
+
+        while True:
+            # File parsing and validation are blocking, so they run off the event loop
+            batch = await asyncio.to_thread(lambda: list(islice(rows, self.batch_size)))
+            if not batch:
+                break
+            operations = await asyncio.to_thread(self._prepare, batch, report)
+            if pending:
+                await pending
+            pending = asyncio.create_task(self._write(operations, report))
+        if pending:
+            await pending
+
+        report.seconds = round(time.perf_counter() - started, 3)
+        report.rows_per_second = round(report.rows_read / report.seconds, 1) if report.seconds else 0.0
+        return report
+
+
+cli = typer.Typer(help="Bulk import quiz banks into MongoDB.")
+
+
+@cli.command()
+def main(
+    path: Path = typer.Argument(..., exists=True, dir_okay=False, help="CSV or JSONL file of quizzes"),
+    fmt: Optional[str] = typer.Option(None, "--format", help="csv or jsonl; detected from the extension by default"),
+    batch_size: int = typer.Option(BATCH_SIZE, help="Rows per bulk write"),
+    tenant: str = typer.Option(DEFAULT_TENANT, help="Tenant (college) that receives the quizzes"),
+):
+    # Imported here so `--help` works without a database configuration
+    from database import db
+    from server import Quiz
+
+    async def run_import():
+        importer = QuizImporter(db.quizzes, Quiz, tenant, batch_size)
+        await importer.ensure_indexes()
+        with open(path, "rb") as stream:
+            return await importer.run(iter_rows(stream, fmt or detect_format(path.name)))
+
+    report = asyncio.run(run_import())
+    typer.echo(report.json(indent=2))
+    if report.invalid:
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,304 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import heapq
+import logging
+import os
+import random
+import time
+
+from tenancy import TENANT_FIELD, drop_index_if_exists
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_SECONDS = float(os.environ.get('QUIZ_SCHEDULER_FLUSH_SECONDS', 5))
+MAX_USERS_IN_MEMORY = int(os.environ.get('QUIZ_SCHEDULER_MAX_USERS', 10000))
+# A student's requests can land on several workers; each reloads its copy of the queue this often
+USER_TTL_SECONDS = float(os.environ.get('QUIZ_SCHEDULER_USER_TTL_SECONDS', 60))
+
+DUPLICATE_KEY = 11000
+
+DAY = 24 * 60 * 60
+# A missed question comes back within the same study session
+RELEARN_SECONDS = 10 * 60
+MIN_EASE = 1.3
+INITIAL_EASE = 2.5
+
+
+class Card:
+    __slots__ = ("due_at", "interval", "ease", "repetitions", "reviewed_at")
+
+    def __init__(self, due_at: float, interval: float = 0, ease: float = INITIAL_EASE, repetitions: int = 0, reviewed_at: float = 0):
+        self.due_at = due_at
+        self.interval = interval
+        self.ease = ease
+        self.repetitions = repetitions
+        self.reviewed_at = reviewed_at
+
+    def review(self, correct: bool, now: float):
+        # SM-2 with two grades: a correct answer is quality 4, a wrong one quality 1
+        quality = 4 if correct else 1
+        if correct:
+            self.repetitions += 1
+            if self.repetitions == 1:
+                self.interval = DAY
+            elif self.repetitions == 2:
+                self.interval = 3 * DAY
+            else:
+                self.interval = self.interval * self.ease
+        else:
+            self.repetitions = 0
+            self.interval = RELEARN_SECONDS
+        self.ease = max(MIN_EASE, self.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        self.due_at = now + self.interval
+        self.reviewed_at = now
+
+
+class UserQueue:
+    __slots__ = ("cards", "heap", "next_new", "dirty", "loaded_at")
+
+    def __init__(self):
+        self.loaded_at = time.monotonic()
+        self.cards: Dict[str, Card] = {}
+        # (due_at, quiz_id); entries whose due_at no longer matches the card are stale
+        self.heap: List[Tuple[float, str]] = []
+        self.next_new = 0
+        self.dirty: Set[str] = set()
+
+
+class TenantQueues:
+    """One tenant's quiz order and the queues of its users in memory."""
+
+    __slots__ = ("users", "loading", "quiz_order", "ordered", "live_quizzes")
+
+    def __init__(self):
+        self.users: "OrderedDict[str, UserQueue]" = OrderedDict()
+        self.loading: Dict[str, asyncio.Future] = {}
+        self.quiz_order: List[str] = []
+        self.ordered: Set[str] = set()
+        self.live_quizzes: Set[str] = set()
+
+
+class QuizScheduler:
+    """Per-user spaced-repetition queues for /api/quiz/random.
+
+    Each user's reviewed questions sit in a heap keyed on their next review
+    time, so picking the next question is a peek plus lazy removal of stale
+    entries, and recording an answer is a single push. Questions the user has
+    never seen are served from a shared, append-only shuffled order with a
+    per-user cursor. Queues are loaded once per worker from the
+    quiz_schedules collection and written back in batches.
+
+    Every tenant has its own quiz order and its own MAX_USERS_IN_MEMORY
+    budget, so a busy tenant cannot evict another tenant's users.
+    """
+
+    def __init__(self, db):
+        self.collection = db.quiz_schedules
+        self.tenants: Dict[str, TenantQueues] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _tenant(self, tenant: str) -> TenantQueues:
+        queues = self.tenants.get(tenant)
+        if queues is None:
+            queues = self.tenants[tenant] = TenantQueues()
+        return queues
+
+    # Catalog cache listener interface
+    def catalog_reloaded(self, tenant: str, collection: str, documents: List[dict]):
+        if collection != "quizzes":
+            return
+        queues = self._tenant(tenant)
+        queues.live_quizzes = {doc["id"] for doc in documents if "id" in doc}
+        new_ids = [quiz_id for quiz_id in queues.live_quizzes if quiz_id not in queues.ordered]
+        random.shuffle(new_ids)
+        queues.quiz_order.extend(new_ids)
+        queues.ordered.update(new_ids)
+
+    def catalog_changed(self, tenant: str, collection: str, old: Optional[dict], new: Optional[dict]):
+        if collection != "quizzes":
+            return
+        queues = self._tenant(tenant)
+        if old is not None and "id" in old:
+            queues.live_quizzes.discard(old["id"])
+        if new is not None and "id" in new:
+            if new["id"] not in queues.ordered:
+                queues.quiz_order.append(new["id"])
+                queues.ordered.add(new["id"])
+            queues.live_quizzes.add(new["id"])
+
+    def catalog_evicted(self, tenant: str):
+        # The quiz order is kept: users' cursors point into it, and the next reload only appends
+        pass
+
+    async def ensure_indexes(self):
+        await drop_index_if_exists(self.collection, "user_id_1_quiz_id_1")
+        await self.collection.create_index(
+            [(TENANT_FIELD, ASCENDING), ("user_id", ASCENDING), ("quiz_id", ASCENDING)],
+            unique=True,
+        )
+
+    async def _load_user(self, tenant: str, user_id: str) -> UserQueue:
+        queue = UserQueue()
+        cursor = self.collection.find(
+            {TENANT_FIELD: tenant, "user_id": user_id},
+            {"_id": 0, "quiz_id": 1, "due_at": 1, "interval": 1, "ease": 1, "repetitions": 1, "reviewed_at": 1},
+        )
+        async for row in cursor:
+            # Stored as UTC; pymongo returns naive datetimes, which .timestamp() would read as local time
+            due_at = row["due_at"].replace(tzinfo=timezone.utc).timestamp()
+            card = Card(due_at, row["interval"], row["ease"], row["repetitions"], row.get("reviewed_at", 0))
+            queue.cards[row["quiz_id"]] = card
+            queue.heap.append((card.due_at, row["quiz_id"]))
+        heapq.heapify(queue.heap)
+        return queue
+
+    async def _queue(self, tenant: str, user_id: str) -> UserQueue:
+        queues = self._tenant(tenant)
+        queue = queues.users.get(user_id)
+        # Unsaved reviews are kept until flushed; otherwise another worker may have reviews we have not seen
+        if queue is not None and (queue.dirty or time.monotonic() - queue.loaded_at < USER_TTL_SECONDS):
+            queues.users.move_to_end(user_id)
+            return queue
+
+        # Concurrent first requests for the same user share one load
+        loading = queues.loading.get(user_id)
+        if loading is None:
+            loading = asyncio.ensure_future(self._load_user(tenant, user_id))
+            queues.loading[user_id] = loading
+            try:
+                queue = await loading
+            finally:
+                del queues.loading[user_id]
+            queues.users[user_id] = queue
+            self._evict(queues)
+            return queue
+        return await asyncio.shield(loading)
+
+    def _evict(self, queues: TenantQueues):
+        # Users with unsaved reviews stay until the next flush has written them
+        excess = len(queues.users) - MAX_USERS_IN_MEMORY
+        for user_id in list(queues.users):
+            if excess <= 0:
+                break
+            if not queues.users[user_id].dirty:
+                del queues.users[user_id]
+                excess -= 1
+
+    def _next_new(self, queues: TenantQueues, queue: UserQueue) -> Optional[str]:
+        while queue.next_new < len(queues.quiz_order):
+            quiz_id = queues.quiz_order[queue.next_new]
+            if quiz_id in queues.live_quizzes and quiz_id not in queue.cards:
+                return quiz_id
+            queue.next_new += 1
+        return None
+
+    async def next_quiz(self, tenant: str, user_id: str, now: Optional[float] = None) -> Optional[str]:
+        """Returns the quiz id to show next: a due review, then an unseen question, then the earliest review."""
+        now = now or time.time()
+        queues = self._tenant(tenant)
+        queue = await self._queue(tenant, user_id)
+        heap = queue.heap
+        while heap:
+            due_at, quiz_id = heap[0]
+            card = queue.cards.get(quiz_id)
+            if card is None or card.due_at != due_at or quiz_id not in queues.live_quizzes:
+                heapq.heappop(heap)
+                continue
+            if due_at <= now:
+                return quiz_id
+            break
+        return self._next_new(queues, queue) or (heap[0][1] if heap else None)
+
+    async def record(self, tenant: str, user_id: str, quiz_id: str, correct: bool, now: Optional[float] = None):
+        now = now or time.time()
+        queue = await self._queue(tenant, user_id)
+        card = queue.cards.get(quiz_id)
+        if card is None:
+            card = queue.cards[quiz_id] = Card(now)
+        card.review(correct, now)
+        heapq.heappush(queue.heap, (card.due_at, quiz_id))
+        queue.dirty.add(quiz_id)
+        if len(queue.heap) > 2 * len(queue.cards) + 16:
+            # Drop superseded entries so the heap stays proportional to the user's cards
+            queue.heap = [(c.due_at, qid) for qid, c in queue.cards.items()]
+            heapq.heapify(queue.heap)
+
+    async def flush(self):
+        operations = []
+        owners = []
+        pending = []
+        for tenant, queues in self.tenants.items():
+            for user_id, queue in queues.users.items():
+                if not queue.dirty:
+                    continue
+                for quiz_id in queue.dirty:
+                    card = queue.cards[quiz_id]
+                    # Compare-and-set: a newer review written by another worker is never overwritten.
+                    # If one exists the filter misses, the upsert hits the unique index, and the write is dropped.
+                    operations.append(UpdateOne(
+                        {
+                            TENANT_FIELD: tenant,
+                            "user_id": user_id,
+                            "quiz_id": quiz_id,
+                            "$or": [{"reviewed_at": {"$lt": card.reviewed_at}}, {"reviewed_at": {"$exists": False}}],
+                        },
+                        {"$set": {
+                            "due_at": datetime.fromtimestamp(card.due_at, timezone.utc),
+                            "interval": card.interval,
+                            "ease": card.ease,
+                            "repetitions": card.repetitions,
+                            "reviewed_at": card.reviewed_at,
+                        }},
+                        upsert=True,
+                    ))
+                    owners.append(queue)
+                # Reviews recorded while the write is in flight mark their cards dirty again
+                pending.append((queue, queue.dirty))
+                queue.dirty = set()
+        if not operations:
+            return
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY for error in errors):
+                for queue, written in pending:
+                    queue.dirty |= written
+                raise
+            # Lost to a newer review from another worker; reload those users on their next request
+            for error in errors:
+                owners[error["index"]].loaded_at = float("-inf")
+        except PyMongoError:
+            for queue, written in pending:
+                queue.dirty |= written
+            raise
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+            try:
+                await self.flush()
+                for queues in list(self.tenants.values()):
+                    self._evict(queues)
+            except PyMongoError as e:
+                logger.warning("Could not persist quiz schedules: %s", e)
+
+    def start(self):
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except PyMongoError as e:
+            logger.warning("Could not persist quiz schedules on shutdown: %s", e)
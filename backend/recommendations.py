@@ -0,0 +1,152 @@
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+import math
+
+import numpy as np
+
+from search import tokenize
+
+# Collections that can be recommended, with the fields describing each item
+RECOMMENDATION_FIELDS = {
+    "roadmaps": ("role", "skills", "description"),
+    "mock_interviews": ("role", "questions", "tips"),
+}
+# Skills are the strongest signal for matching a resume to a roadmap
+FIELD_WEIGHTS = {"skills": 2.0, "role": 1.5}
+
+MAX_CACHED_RESUMES = 1024
+
+
+def _terms(text: str) -> List[str]:
+    tokens = tokenize(text)
+    # Bigrams keep multi-word skills like "machine learning" distinct from their parts
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def _field_texts(doc: dict, fields) -> List[Tuple[str, float]]:
+    texts = []
+    for field in fields:
+        value = doc.get(field)
+        weight = FIELD_WEIGHTS.get(field, 1.0)
+        if isinstance(value, list):
+            texts.extend((str(item), weight) for item in value)
+        elif value:
+            texts.append((str(value), weight))
+    return texts
+
+
+def resume_text(analysis: dict) -> str:
+    parts = list(analysis.get("strengths", [])) + list(analysis.get("improvements", []))
+    parts.append(analysis.get("analysis", ""))
+    return " ".join(parts)
+
+
+class RecommendationEngine:
+    """Scores resumes against roadmaps and mock interview roles with TF-IDF.
+
+    The item matrix is rebuilt once per catalog data version (any reload or
+    change of a recommended collection marks it stale). Each row is an L2
+    normalised TF-IDF vector, so a resume is scored against every item with a
+    single matrix-vector product over the columns of the resume's terms.
+    """
+
+    def __init__(self):
+        self.documents: Dict[str, Dict[str, dict]] = {name: {} for name in RECOMMENDATION_FIELDS}
+        self.version = 0
+        self._built_version = -1
+        self.vocabulary: Dict[str, int] = {}
+        self.idf = np.zeros(0)
+        self.matrix = np.zeros((0, 0))
+        self.items: List[Tuple[str, dict]] = []
+        self._resume_vectors: "OrderedDict[str, Tuple[int, np.ndarray, np.ndarray]]" = OrderedDict()
+
+    # Catalog cache listener interface
+    def catalog_reloaded(self, collection: str, documents: List[dict]):
+        if collection in RECOMMENDATION_FIELDS:
+            self.documents[collection] = {doc["id"]: doc for doc in documents if "id" in doc}
+            self.version += 1
+
+    def catalog_changed(self, collection: str, old: Optional[dict], new: Optional[dict]):
+        if collection not in RECOMMENDATION_FIELDS:
+            return
+        if old is not None and "id" in old:
+            self.documents[collection].pop(old["id"], None)
+        if new is not None and "id" in new:
+            self.documents[collection][new["id"]] = new
+        self.version += 1
+
+    def _build(self):
+        items = []
+        counts = []
+        for collection, fields in RECOMMENDATION_FIELDS.items():
+            for doc in self.documents[collection].values():
+                weighted = Counter()
+                for text, weight in _field_texts(doc, fields):
+                    for term in _terms(text):
+                        weighted[term] += weight
+                items.append((collection, doc))
+                counts.append(weighted)
+
+        vocabulary = {}
+        for weighted in counts:
+            for term in weighted:
+                vocabulary.setdefault(term, len(vocabulary))
+
+        matrix = np.zeros((len(items), len(vocabulary)), dtype=np.float32)
+        for row, weighted in enumerate(counts):
+            for term, weight in weighted.items():
+                matrix[row, vocabulary[term]] = 1 + math.log(weight)
+
+        document_frequency = np.count_nonzero(matrix, axis=0)
+        idf = np.log((1 + len(items)) / (1 + document_frequency)).astype(np.float32) + 1
+        matrix *= idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+
+        self.items = items
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.matrix = matrix
+        self._built_version = self.version
+        self._resume_vectors.clear()
+
+    def _resume_vector(self, key: str, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        cached = self._resume_vectors.get(key)
+        if cached and cached[0] == self._built_version:
+            self._resume_vectors.move_to_end(key)
+            return cached[1], cached[2]
+
+        counts = Counter(term for term in _terms(text) if term in self.vocabulary)
+        columns = np.fromiter((self.vocabulary[term] for term in counts), dtype=np.int64, count=len(counts))
+        weights = np.fromiter((1 + math.log(n) for n in counts.values()), dtype=np.float32, count=len(counts))
+        weights *= self.idf[columns]
+        norm = np.linalg.norm(weights)
+        if norm:
+            weights /= norm
+
+        self._resume_vectors[key] = (self._built_version, columns, weights)
+        if len(self._resume_vectors) > MAX_CACHED_RESUMES:
+            self._resume_vectors.popitem(last=False)
+        return columns, weights
+
+    def recommend(self, key: str, text: str, k: int = 3) -> Dict[str, List[dict]]:
+        if self._built_version != self.version:
+            self._build()
+        results = {name: [] for name in RECOMMENDATION_FIELDS}
+        if not self.items:
+            return results
+
+        columns, weights = self._resume_vector(key, text)
+        # Only the resume's non-zero terms contribute, so slice those columns before the product
+        scores = self.matrix[:, columns] @ weights if len(columns) else np.zeros(len(self.items))
+
+        for row in np.argsort(-scores, kind="stable"):
+            collection, doc = self.items[row]
+            if len(results[collection]) < k and scores[row] > 0:
+                results[collection].append({
+                    "type": collection,
+                    "id": doc["id"],
+                    "role": doc.get("role", ""),
+                    "score": round(float(scores[row]), 4),
+                })
+        return results
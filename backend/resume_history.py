@@ -0,0 +1,147 @@
+from datetime import datetime
+from pymongo import ASCENDING, DESCENDING
+from typing import Dict, List, Optional
+import re
+
+from search import tokenize
+from tenancy import TENANT_FIELD
+
+HISTORY_INDEX_NAME = "history_covered"
+MAX_HISTORY = 100
+
+LIST_FIELDS = ("strengths", "weaknesses", "improvements")
+COUNT_FIELDS = {field: f"{field}_count" for field in LIST_FIELDS}
+
+# Everything a timeline shows is in the index, so timeline queries never fetch
+# documents (and never read the long analysis text)
+HISTORY_INDEX = [
+    (TENANT_FIELD, ASCENDING),
+    ("user_id", ASCENDING),
+    ("timestamp", DESCENDING),
+    ("id", ASCENDING),
+    ("score", ASCENDING),
+] + [(count_field, ASCENDING) for count_field in COUNT_FIELDS.values()]
+SUMMARY_PROJECTION = {"_id": 0, "id": 1, "score": 1, "timestamp": 1, **{field: 1 for field in COUNT_FIELDS.values()}}
+DIFF_PROJECTION = {"_id": 0, "id": 1, "score": 1, "timestamp": 1, "strengths": 1, "weaknesses": 1}
+
+# Two items with at least this share of meaningful words are the same point reworded
+SIMILAR_ITEM_THRESHOLD = 0.5
+STOPWORDS = {"a", "an", "and", "the", "of", "in", "on", "for", "to", "with", "is", "are", "your", "no", "more", "lack"}
+
+
+def list_counts(analysis: dict) -> Dict[str, int]:
+    """Denormalised list lengths stored with each analysis, since an index cannot cover an array's size."""
+    return {count_field: len(analysis.get(field) or []) for field, count_field in COUNT_FIELDS.items()}
+
+
+def _item_terms(item: str) -> frozenset:
+    return frozenset(token for token in tokenize(item) if token not in STOPWORDS)
+
+
+def _similarity(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _normalize(item: str) -> str:
+    return re.sub(r"\s+", " ", item).strip().lower()
+
+
+def diff_items(before: List[str], after: List[str]) -> Dict[str, List[str]]:
+    """Pairs up items of two analyses that make the same point, even when reworded.
+
+    Exact matches pair first, then the most similar remaining pairs above
+    SIMILAR_ITEM_THRESHOLD. Unpaired items were removed or added.
+    """
+    unmatched_before = dict(enumerate(before))
+    unmatched_after = dict(enumerate(after))
+    kept = []
+
+    by_text = {}
+    for i, item in unmatched_before.items():
+        by_text.setdefault(_normalize(item), i)
+    for j, item in list(unmatched_after.items()):
+        i = by_text.pop(_normalize(item), None)
+        if i is not None:
+            del unmatched_before[i]
+            del unmatched_after[j]
+            kept.append(item)
+
+    terms_before = {i: _item_terms(item) for i, item in unmatched_before.items()}
+    terms_after = {j: _item_terms(item) for j, item in unmatched_after.items()}
+    candidates = sorted(
+        (
+            (_similarity(terms_before[i], terms_after[j]), i, j)
+            for i in terms_before
+            for j in terms_after
+        ),
+        reverse=True,
+    )
+    for score, i, j in candidates:
+        if score < SIMILAR_ITEM_THRESHOLD:
+            break
+        if i in unmatched_before and j in unmatched_after:
+            del unmatched_before[i]
+            kept.append(unmatched_after.pop(j))
+
+    return {
+        "added": list(unmatched_after.values()),
+        "removed": list(unmatched_before.values()),
+        "kept": kept,
+    }
+
+
+class ResumeHistory:
+    """Per-user timelines of resume analyses, and comparisons between two of them.
+
+    Timelines are covered index queries returning only scores, timestamps
+    and list lengths; the full analysis is loaded separately, one item at a
+    time, when the student opens it.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def ensure_indexes(self):
+        # Analyses saved before the counts existed get them computed in place
+        missing = {COUNT_FIELDS["strengths"]: {"$exists": False}}
+        await self.collection.update_many(missing, [{"$set": {
+            count_field: {"$size": {"$ifNull": [f"${field}", []]}}
+            for field, count_field in COUNT_FIELDS.items()
+        }}])
+        await self.collection.create_index(HISTORY_INDEX, name=HISTORY_INDEX_NAME)
+
+    async def timeline(self, tenant: str, user_id: str, limit: int = 20, before: Optional[datetime] = None) -> List[dict]:
+        query = {TENANT_FIELD: tenant, "user_id": user_id}
+        if before:
+            query["timestamp"] = {"$lt": before}
+        cursor = self.collection.find(query, SUMMARY_PROJECTION).sort("timestamp", DESCENDING).limit(min(limit, MAX_HISTORY))
+        return await cursor.to_list(None)
+
+    async def detail(self, tenant: str, user_id: str, analysis_id: str) -> Optional[dict]:
+        return await self.collection.find_one(
+            {TENANT_FIELD: tenant, "user_id": user_id, "id": analysis_id},
+            {"_id": 0, TENANT_FIELD: 0},
+        )
+
+    async def compare(self, tenant: str, user_id: str, base_id: str, other_id: str) -> Optional[dict]:
+        docs = await self.collection.find(
+            {TENANT_FIELD: tenant, "user_id": user_id, "id": {"$in": [base_id, other_id]}},
+            DIFF_PROJECTION,
+        ).to_list(2)
+        by_id = {doc["id"]: doc for doc in docs}
+        if base_id not in by_id or other_id not in by_id:
+            return None
+
+        base, other = by_id[base_id], by_id[other_id]
+        return {
+            "base_id": base_id,
+            "other_id": other_id,
+            "base_score": base["score"],
+            "other_score": other["score"],
+            "score_change": other["score"] - base["score"],
+            "days_between": round((other["timestamp"] - base["timestamp"]).total_seconds() / 86400, 2),
+            "strengths": diff_items(base.get("strengths", []), other.get("strengths", [])),
+            "weaknesses": diff_items(base.get("weaknesses", []), other.get("weaknesses", [])),
+        }
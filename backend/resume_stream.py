@@ -0,0 +1,170 @@
+from typing import AsyncIterator, List, Optional, Tuple
+import base64
+import json
+
+import httpx
+
+GEMINI_STREAM_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:streamGenerateContent"
+STREAM_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+WHITESPACE = " \t\r\n"
+
+
+class IncrementalJsonParser:
+    """Parses a top-level JSON object from a text stream as it arrives.
+
+    Leading prose and a ```json fence are skipped. feed() returns events for
+    everything completed by the new text: ("item", key, value) for each
+    element of an array field, and ("field", key, value) for each finished
+    top-level field.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.started = False
+        self.done = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.expecting = "key"
+        self.key: Optional[str] = None
+        self.key_start = 0
+        self.value_start = 0
+        self.in_array = False
+        self.item_start: Optional[int] = None
+        self.fields = {}
+
+    def _load(self, start: int, end: int):
+        try:
+            return True, json.loads(self.buffer[start:end].strip(WHITESPACE))
+        except ValueError:
+            return False, None
+
+    def _end_item(self, end: int, events: List[Tuple[str, str, object]]):
+        if self.item_start is not None:
+            ok, value = self._load(self.item_start, end)
+            if ok:
+                events.append(("item", self.key, value))
+        self.item_start = None
+
+    def _end_field(self, end: int, events: List[Tuple[str, str, object]]):
+        ok, value = self._load(self.value_start, end)
+        if ok and self.key is not None:
+            self.fields[self.key] = value
+            events.append(("field", self.key, value))
+        self.expecting = "key"
+        self.key = None
+
+    def feed(self, text: str) -> List[Tuple[str, str, object]]:
+        events: List[Tuple[str, str, object]] = []
+        self.buffer += text
+        buffer = self.buffer
+
+        for i in range(self.position, len(buffer)):
+            if self.done:
+                break
+            c = buffer[i]
+
+            if not self.started:
+                if c == "{":
+                    self.started = True
+                    self.depth = 1
+                continue
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.expecting == "key":
+                        ok, self.key = self._load(self.key_start, i + 1)
+                        self.expecting = "colon"
+                continue
+
+            if self.depth == 1:
+                if self.expecting == "colon":
+                    if c == ":":
+                        self.expecting = "value"
+                    continue
+                if self.expecting == "value" and c not in WHITESPACE:
+                    self.value_start = i
+                    self.expecting = "in_value"
+                elif self.expecting == "in_value" and c in ",}":
+                    self._end_field(i, events)
+                    if c == "}":
+                        self.done = True
+                    continue
+                elif self.expecting == "key" and c == "}":
+                    self.done = True
+                    continue
+            elif self.depth == 2 and self.in_array:
+                if c == ",":
+                    self._end_item(i, events)
+                    continue
+                if c == "]":
+                    self._end_item(i, events)
+                    self.depth -= 1
+                    continue
+                if c not in WHITESPACE and self.item_start is None:
+                    self.item_start = i
+
+            if c == '"':
+                self.in_string = True
+                if self.depth == 1 and self.expecting == "key":
+                    self.key_start = i
+            elif c in "[{":
+                self.depth += 1
+                if self.depth == 2:
+                    self.in_array = c == "["
+                    self.item_start = None
+            elif c in "]}":
+                self.depth -= 1
+
+        self.position = len(buffer)
+        return events
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def stream_gemini(
+    api_key: str,
+    model: str,
+    system_message: str,
+    prompt: str,
+    pdf_content: Optional[bytes] = None,
+) -> AsyncIterator[str]:
+    """Yields text chunks from Gemini's server-sent-events streaming endpoint."""
+    parts = [{"text": prompt}]
+    if pdf_content is not None:
+        parts.append({"inline_data": {
+            "mime_type": "application/pdf",
+            "data": base64.b64encode(pdf_content).decode(),
+        }})
+    body = {
+        "system_instruction": {"parts": [{"text": system_message}]},
+        "contents": [{"role": "user", "parts": parts}],
+    }
+
+    async with httpx.AsyncClient(timeout=STREAM_TIMEOUT) as http:
+        async with http.stream(
+            "POST",
+            GEMINI_STREAM_URL.format(model=model),
+            params={"alt": "sse"},
+            # In a header, not the query string, so the key never appears in URLs that errors and logs print
+            headers={"x-goog-api-key": api_key},
+            json=body,
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = json.loads(line[5:])
+                for candidate in payload.get("candidates", []):
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
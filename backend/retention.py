@@ -0,0 +1,224 @@
+from bson import json_util
+from bson.json_util import RELAXED_JSON_OPTIONS
+from datetime import datetime, timedelta
+from pathlib import Path
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
+from pydantic import BaseModel
+from typing import List, Optional
+import asyncio
+import gzip
+import logging
+import os
+import uuid
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_CHUNK_SIZE = int(os.environ.get('RETENTION_ARCHIVE_CHUNK_SIZE', 1000))
+RUN_INTERVAL_SECONDS = float(os.environ.get('RETENTION_INTERVAL_SECONDS', 3600))
+# The archiver deletes what it has archived; the TTL index only catches documents it
+# could not get to (e.g. no worker ran it for this long after their retention ended)
+TTL_GRACE_DAYS = float(os.environ.get('RETENTION_TTL_GRACE_DAYS', 30))
+LEASE = timedelta(minutes=30)
+
+TTL_INDEX_NAME = "retention_ttl"
+INDEX_OPTIONS_CONFLICT = 85
+INDEX_NOT_FOUND = 27
+
+WORKER_ID = str(uuid.uuid4())
+
+
+class RetentionPolicy(BaseModel):
+    collection: str
+    days: float
+    field: str = "timestamp"
+
+    @property
+    def enabled(self) -> bool:
+        return self.days > 0
+
+    @property
+    def ttl_seconds(self) -> int:
+        return int((self.days + TTL_GRACE_DAYS) * 24 * 60 * 60)
+
+
+def policies_from_env() -> List[RetentionPolicy]:
+    # A retention of 0 days keeps documents forever
+    return [
+        RetentionPolicy(collection="status_checks", days=float(os.environ.get('RETENTION_STATUS_CHECKS_DAYS', 30))),
+        RetentionPolicy(collection="quiz_attempts", days=float(os.environ.get('RETENTION_QUIZ_ATTEMPTS_DAYS', 365))),
+        RetentionPolicy(collection="interview_practices", days=float(os.environ.get('RETENTION_INTERVIEW_PRACTICES_DAYS', 365))),
+    ]
+
+
+def _fsync_directory(path: Path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _append_chunk(path: Path, docs: List[dict]):
+    created = not path.exists()
+    with open(path, "ab") as raw:
+        # Each chunk is its own gzip member; concatenated members are still one valid .gz file
+        with gzip.GzipFile(fileobj=raw, mode="ab") as f:
+            for doc in docs:
+                f.write(json_util.dumps(doc, json_options=RELAXED_JSON_OPTIONS).encode())
+                f.write(b"\n")
+        # The chunk is deleted from MongoDB once this returns, so it has to be on disk by then
+        raw.flush()
+        os.fsync(raw.fileno())
+    if created:
+        _fsync_directory(path.parent)
+
+
+class RetentionManager:
+    """Keeps the hot history collections small.
+
+    A background job streams documents past their retention in chunks to
+    gzip-compressed JSONL files under the archive directory, and deletes
+    each chunk only once it has been written. A failed run therefore leaves
+    documents in place for the next one (a chunk may then be archived
+    twice). A TTL index set TTL_GRACE_DAYS beyond the retention is only a
+    backstop. A lease in retention_state makes sure only one worker
+    archives a collection at a time.
+
+    Archives are written by whichever worker holds the lease, so in a
+    multi-pod deployment RETENTION_ARCHIVE_DIR must be a shared volume;
+    otherwise they end up on the local disks of different pods.
+    """
+
+    def __init__(self, db, archive_dir: Path, policies: Optional[List[RetentionPolicy]] = None):
+        self.db = db
+        self.archive_dir = archive_dir
+        self.policies = policies if policies is not None else policies_from_env()
+        self.state = db.retention_state
+        self.stats = {"archived": 0, "last_run": None}
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure_indexes(self):
+        for policy in self.policies:
+            collection = self.db[policy.collection]
+            if not policy.enabled:
+                try:
+                    await collection.drop_index(TTL_INDEX_NAME)
+                except OperationFailure as e:
+                    if e.code != INDEX_NOT_FOUND:
+                        raise
+                continue
+            try:
+                await collection.create_index(
+                    [(policy.field, ASCENDING)],
+                    name=TTL_INDEX_NAME,
+                    expireAfterSeconds=policy.ttl_seconds,
+                )
+            except OperationFailure as e:
+                if e.code != INDEX_OPTIONS_CONFLICT:
+                    raise
+                # Retention changed since the index was built; update it in place
+                await self.db.command(
+                    "collMod",
+                    policy.collection,
+                    index={"name": TTL_INDEX_NAME, "expireAfterSeconds": policy.ttl_seconds},
+                )
+
+    async def _acquire(self, name: str, now: datetime) -> Optional[dict]:
+        try:
+            return await self.state.find_one_and_update(
+                {"_id": name, "$or": [{"lease_until": {"$lt": now}}, {"lease_until": {"$exists": False}}]},
+                {"$set": {"lease_until": now + LEASE, "owner": WORKER_ID}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # Another worker holds the lease
+            return None
+
+    async def _renew(self, name: str) -> bool:
+        result = await self.state.update_one(
+            {"_id": name, "owner": WORKER_ID},
+            {"$set": {"lease_until": datetime.utcnow() + LEASE}},
+        )
+        return result.matched_count == 1
+
+    async def _archive_chunk(self, collection, path: Path, chunk: List[dict]) -> int:
+        await asyncio.to_thread(_append_chunk, path, chunk)
+        result = await collection.delete_many({"_id": {"$in": [doc["_id"] for doc in chunk]}})
+        return result.deleted_count
+
+    async def archive(self, policy: RetentionPolicy, now: Optional[datetime] = None) -> int:
+        now = now or datetime.utcnow()
+        state = await self._acquire(policy.collection, now)
+        if state is None:
+            return 0
+
+        archived_until = state.get("archived_until")
+        cutoff = now - timedelta(days=policy.days)
+        collection = self.db[policy.collection]
+        archived = 0
+        try:
+            directory = self.archive_dir / policy.collection
+            if not directory.exists():
+                directory.mkdir(parents=True)
+                _fsync_directory(directory.parent)
+            # The worker id keeps files from different pods apart on a shared volume
+            path = directory / f"{policy.collection}-{now:%Y%m%dT%H%M%S}-{WORKER_ID[:8]}.jsonl.gz"
+
+            # Everything still present past the cutoff is unarchived (or archived but not yet deleted)
+            cursor = collection.find(
+                {policy.field: {"$lt": cutoff}},
+                batch_size=ARCHIVE_CHUNK_SIZE,
+            ).sort(policy.field, ASCENDING)
+            chunk = []
+            complete = True
+            async for doc in cursor:
+                chunk.append(doc)
+                if len(chunk) >= ARCHIVE_CHUNK_SIZE:
+                    archived += await self._archive_chunk(collection, path, chunk)
+                    chunk = []
+                    # A large backlog can take longer than one lease
+                    if not await self._renew(policy.collection):
+                        logger.warning("Lost the %s retention lease, leaving the rest to its new holder", policy.collection)
+                        complete = False
+                        break
+            if chunk and complete:
+                archived += await self._archive_chunk(collection, path, chunk)
+            if complete:
+                archived_until = cutoff
+        finally:
+            await self.state.update_one(
+                {"_id": policy.collection, "owner": WORKER_ID},
+                {"$set": {"archived_until": archived_until, "lease_until": datetime.utcnow()}},
+            )
+
+        if archived:
+            logger.info("Archived %d %s documents to %s", archived, policy.collection, self.archive_dir)
+        return archived
+
+    async def run(self):
+        for policy in self.policies:
+            if policy.enabled:
+                self.stats["archived"] += await self.archive(policy)
+        self.stats["last_run"] = datetime.utcnow()
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run()
+            except (PyMongoError, OSError) as e:
+                logger.warning("Retention run failed: %s", e)
+            await asyncio.sleep(RUN_INTERVAL_SECONDS)
+
+    def start(self):
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
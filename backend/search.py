@@ -0,0 +1,344 @@
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import heapq
+import logging
+import math
+import re
+
+from tenancy import TENANT_FIELD
+
+logger = logging.getLogger(__name__)
+
+# Which fields of each catalog collection are searchable, and which one is shown as the title
+SEARCH_FIELDS = {
+    "quizzes": (("question",), "question"),
+    "roadmaps": (("role", "skills", "description"), "role"),
+    "mock_interviews": (("role", "questions", "tips"), "role"),
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Query terms are expanded to indexed terms; weaker matches count for less
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.8
+TYPO_WEIGHT = 0.6
+MAX_PREFIX_EXPANSIONS = 32
+MIN_PREFIX_LENGTH = 3
+MIN_TYPO_LENGTH = 4
+
+# Dropped from queries that have other words; they match most documents and barely affect ranking
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "i",
+    "in", "is", "it", "of", "on", "or", "the", "to", "what", "when", "which", "why", "with", "you", "your",
+}
+
+TEXT_INDEX_NAME = "search_text"
+INDEX_SPEC_CONFLICTS = {85, 86}
+
+DocKey = Tuple[str, str]
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def document_text(collection: str, doc: dict) -> str:
+    fields, _ = SEARCH_FIELDS[collection]
+    parts = []
+    for field in fields:
+        value = doc.get(field)
+        if isinstance(value, list):
+            parts.extend(str(item) for item in value)
+        elif value:
+            parts.append(str(value))
+    return " ".join(parts)
+
+
+def _deletes(term: str) -> Set[str]:
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """True if a and b differ by at most one insertion, deletion, substitution or transposition."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:] or (
+            i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+        )
+    return a[i:] == b[i + 1:]
+
+
+def _bm25(term_weight: float, frequency: int, length: int, average_length: float) -> float:
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+    return term_weight * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+
+class SearchIndex:
+    """In-memory inverted index with BM25 ranking over the catalog collections.
+
+    Documents are added and removed one at a time, so catalog changes only touch
+    the postings of the affected documents. Terms are kept in a sorted list for
+    prefix expansion and in a single-deletion map for typo tolerance.
+
+    Besides a posting map for lookups, each term keeps its documents grouped by
+    term frequency and sorted by length. Within a group BM25 only falls with
+    length, so merging the group heads yields a term's documents best first
+    whatever the average length. Queries walk these orders and stop as soon as
+    no unseen document can make the top results (Fagin's threshold algorithm),
+    so common terms cost about as much as rare ones.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[DocKey, int]] = defaultdict(dict)
+        # term -> frequency -> sorted (document length, key)
+        self.impacts: Dict[str, Dict[int, List[Tuple[int, DocKey]]]] = defaultdict(dict)
+        self.doc_terms: Dict[DocKey, Counter] = {}
+        self.doc_titles: Dict[DocKey, str] = {}
+        self.doc_lengths: Dict[DocKey, int] = {}
+        self.total_length = 0
+        self.vocabulary: List[str] = []
+        self.typo_variants: Dict[str, Set[str]] = defaultdict(set)
+
+    def __len__(self):
+        return len(self.doc_terms)
+
+    def _add_term(self, term: str):
+        position = bisect_left(self.vocabulary, term)
+        self.vocabulary.insert(position, term)
+        if len(term) >= MIN_TYPO_LENGTH:
+            for variant in _deletes(term):
+                self.typo_variants[variant].add(term)
+
+    def _remove_term(self, term: str):
+        del self.postings[term]
+        del self.impacts[term]
+        position = bisect_left(self.vocabulary, term)
+        del self.vocabulary[position]
+        if len(term) >= MIN_TYPO_LENGTH:
+            for variant in _deletes(term):
+                terms = self.typo_variants[variant]
+                terms.discard(term)
+                if not terms:
+                    del self.typo_variants[variant]
+
+    def add(self, collection: str, doc: dict):
+        key = (collection, doc["id"])
+        terms = Counter(tokenize(document_text(collection, doc)))
+        if self.doc_terms.get(key) == terms:
+            self.doc_titles[key] = str(doc.get(SEARCH_FIELDS[collection][1], ""))
+            return
+        self.remove(collection, doc["id"])
+
+        length = sum(terms.values())
+        for term, frequency in terms.items():
+            if term not in self.postings:
+                self._add_term(term)
+            self.postings[term][key] = frequency
+            insort(self.impacts[term].setdefault(frequency, []), (length, key))
+        self.doc_terms[key] = terms
+        self.doc_titles[key] = str(doc.get(SEARCH_FIELDS[collection][1], ""))
+        self.doc_lengths[key] = length
+        self.total_length += length
+
+    def remove(self, collection: str, doc_id: str):
+        key = (collection, doc_id)
+        terms = self.doc_terms.pop(key, None)
+        if terms is None:
+            return
+        self.doc_titles.pop(key, None)
+        length = self.doc_lengths.pop(key)
+        self.total_length -= length
+        for term, frequency in terms.items():
+            postings = self.postings[term]
+            postings.pop(key, None)
+            group = self.impacts[term][frequency]
+            del group[bisect_left(group, (length, key))]
+            if not group:
+                del self.impacts[term][frequency]
+            if not postings:
+                self._remove_term(term)
+
+    def replace_collection(self, collection: str, documents: List[dict]):
+        """Brings one collection in line with a full reload, re-indexing only what changed."""
+        current = {doc["id"] for doc in documents if "id" in doc}
+        stale = [doc_id for (name, doc_id) in self.doc_terms if name == collection and doc_id not in current]
+        for doc_id in stale:
+            self.remove(collection, doc_id)
+        for doc in documents:
+            if "id" in doc:
+                self.add(collection, doc)
+
+    # Catalog cache listener interface
+    def catalog_reloaded(self, collection: str, documents: List[dict]):
+        if collection in SEARCH_FIELDS:
+            self.replace_collection(collection, documents)
+
+    def catalog_changed(self, collection: str, old: Optional[dict], new: Optional[dict]):
+        if collection not in SEARCH_FIELDS:
+            return
+        if old is not None and "id" in old and (new is None or new.get("id") != old["id"]):
+            self.remove(collection, old["id"])
+        if new is not None and "id" in new:
+            self.add(collection, new)
+
+    def _expand(self, token: str) -> Dict[str, float]:
+        expansions: Dict[str, float] = {}
+        if token in self.postings:
+            expansions[token] = EXACT_WEIGHT
+
+        # Very short prefixes would expand to dozens of unrelated terms
+        position = bisect_left(self.vocabulary, token) if len(token) >= MIN_PREFIX_LENGTH else len(self.vocabulary)
+        while position < len(self.vocabulary) and len(expansions) < MAX_PREFIX_EXPANSIONS:
+            term = self.vocabulary[position]
+            if not term.startswith(token):
+                break
+            expansions.setdefault(term, PREFIX_WEIGHT)
+            position += 1
+
+        if not expansions and len(token) >= MIN_TYPO_LENGTH:
+            candidates = set(self.typo_variants.get(token, ()))
+            for variant in _deletes(token):
+                candidates.update(self.typo_variants.get(variant, ()))
+                if variant in self.postings:
+                    candidates.add(variant)
+            for term in candidates:
+                if _within_one_edit(token, term):
+                    expansions[term] = TYPO_WEIGHT
+        return expansions
+
+    def _ranked(self, expansions: Dict[str, float], average_length: float) -> Iterator[Tuple[float, DocKey]]:
+        """Yields (score, key) for the documents matching any of the expansions, best first.
+
+        A document matching several expansions comes first with its best one.
+        """
+        heads = []
+        for term, term_weight in expansions.items():
+            for frequency, group in self.impacts[term].items():
+                heads.append((-_bm25(term_weight, frequency, group[0][0], average_length), len(heads), 0, term_weight, frequency, group))
+        heapq.heapify(heads)
+        while heads:
+            negative_score, tiebreak, position, term_weight, frequency, group = heads[0]
+            yield -negative_score, group[position][1]
+            position += 1
+            if position < len(group):
+                score = _bm25(term_weight, frequency, group[position][0], average_length)
+                heapq.heapreplace(heads, (-score, tiebreak, position, term_weight, frequency, group))
+            else:
+                heapq.heappop(heads)
+
+    def search(self, query: str, limit: int = 10, collections: Optional[List[str]] = None) -> List[dict]:
+        document_count = len(self.doc_terms)
+        if not document_count:
+            return []
+        average_length = self.total_length / document_count
+
+        # One group per query token: the terms it expands to, with their weight * idf
+        tokens = set(tokenize(query))
+        groups = []
+        for token in (tokens - STOPWORDS) or tokens:
+            expansions = {
+                term: weight * math.log(1 + (document_count - len(self.postings[term]) + 0.5) / (len(self.postings[term]) + 0.5))
+                for term, weight in self._expand(token).items()
+            }
+            if expansions:
+                groups.append(expansions)
+
+        def score(key: DocKey) -> float:
+            length = self.doc_lengths[key]
+            total = 0.0
+            for expansions in groups:
+                best = 0.0
+                for term, term_weight in expansions.items():
+                    frequency = self.postings[term].get(key)
+                    if frequency:
+                        best = max(best, _bm25(term_weight, frequency, length, average_length))
+                total += best
+            return total
+
+        # Round-robin over the groups' best-first orders. Any document not seen yet scores
+        # at most the sum of the scores each order has got down to, so once the k-th best
+        # result reaches that sum the rest of the postings cannot change the top k.
+        streams = [self._ranked(expansions, average_length) for expansions in groups]
+        frontier = [math.inf] * len(streams)
+        top: List[Tuple[float, DocKey]] = []
+        seen: Set[DocKey] = set()
+        while any(stream is not None for stream in streams):
+            for i, stream in enumerate(streams):
+                if stream is None:
+                    continue
+                item = next(stream, None)
+                if item is None:
+                    streams[i] = None
+                    frontier[i] = 0.0
+                    continue
+                frontier[i], key = item
+                if key in seen or (collections and key[0] not in collections):
+                    continue
+                seen.add(key)
+                entry = (score(key), key)
+                if len(top) < limit:
+                    heapq.heappush(top, entry)
+                elif entry > top[0]:
+                    heapq.heapreplace(top, entry)
+            if len(top) >= limit and top[0][0] >= sum(frontier):
+                break
+
+        return [
+            {"type": name, "id": doc_id, "title": self.doc_titles[(name, doc_id)], "score": round(score, 4)}
+            for score, (name, doc_id) in sorted(top, reverse=True)
+        ]
+
+class MongoTextSearch:
+    """Search backend using MongoDB text indexes instead of the in-memory index.
+
+    The text indexes are prefixed with the tenant, so every query is limited
+    to one tenant's index entries.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    async def ensure_indexes(self):
+        for collection, (fields, _) in SEARCH_FIELDS.items():
+            keys = [(TENANT_FIELD, ASCENDING)] + [(field, "text") for field in fields]
+            try:
+                await self.db[collection].create_index(keys, name=TEXT_INDEX_NAME)
+            except OperationFailure as e:
+                if e.code not in INDEX_SPEC_CONFLICTS:
+                    raise
+                # Built before tenants existed; a collection can only have one text index
+                await self.db[collection].drop_index(TEXT_INDEX_NAME)
+                await self.db[collection].create_index(keys, name=TEXT_INDEX_NAME)
+
+    async def search(self, tenant: str, query: str, limit: int = 10, collections: Optional[List[str]] = None) -> List[dict]:
+        results = []
+        for collection, (_, title_field) in SEARCH_FIELDS.items():
+            if collections and collection not in collections:
+                continue
+            cursor = self.db[collection].find(
+                {TENANT_FIELD: tenant, "$text": {"$search": query}},
+                {"id": 1, title_field: 1, "score": {"$meta": "textScore"}},
+            ).sort([("score", {"$meta": "textScore"})]).limit(limit)
+            async for doc in cursor:
+                results.append({
+                    "type": collection,
+                    "id": doc["id"],
+                    "title": str(doc.get(title_field, "")),
+                    "score": round(doc["score"], 4),
+                })
+        results.sort(key=lambda result: result["score"], reverse=True)
+        return results[:limit]
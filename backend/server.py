@@ -1,26 +1,74 @@
-from fastapi import FastAPI, APIRouter, File, UploadFile, HTTPException
+from fastapi import FastAPI, APIRouter, Depends, File, Header, UploadFile, HTTPException
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Optional, Union
 import uuid
 from datetime import datetime
 import asyncio
-from emergentintegrations.llm.chat import LlmChat, UserMessage, FileContentWithMimeType
 import tempfile
 import random
+import secrets
+import json
+import re
+import time
+from database import client, db, catalog_db, analytics_db, status_checks_collection, database_health
+from startup import seed_database, startup_report, timed
+from llm import llm_chat_module
+from catalog_cache import CatalogCache
+from pymongo.errors import ConnectionFailure, PyMongoError
+from search import SearchIndex, MongoTextSearch, SEARCH_FIELDS
+from pdf_extraction import extract_resume, extraction_stats, shutdown_pool, ResumeRejected, MAX_PDF_BYTES
+from resume_stream import IncrementalJsonParser, sse_event, stream_gemini
+from interview_grading import InterviewGrader, GradingUnavailable, heuristic_grade
+from quiz_scheduler import QuizScheduler
+from leaderboard import Leaderboards, GLOBAL_BOARD, cohort_board, METRICS as LEADERBOARD_METRICS, TOP_K as LEADERBOARD_TOP_K
+from admission import AdmissionController, AdmissionControlMiddleware
+from retention import RetentionManager
+from quiz_import import QuizImporter, ImportReport, iter_rows, detect_format, quiz_hash_field
+from recommendations import RecommendationEngine, RECOMMENDATION_FIELDS, resume_text
+from resume_history import ResumeHistory, list_counts, MAX_HISTORY
+from tenancy import TENANTS, TENANT_FIELD, TenantLRU, PerTenant, get_tenant, assign_default_tenant, ensure_tenant_indexes
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Per-worker catalog cache, partitioned by tenant and kept coherent with MongoDB change streams
+CATALOG_SNAPSHOT_PATH = Path(os.environ.get('CATALOG_SNAPSHOT_PATH', ROOT_DIR / 'catalog_snapshot.bson'))
+catalog_cache = CatalogCache(catalog_db, snapshot_path=CATALOG_SNAPSHOT_PATH)
+
+# Full-text search: in-memory BM25 index fed by the catalog cache, or MongoDB text indexes
+SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'memory')
+search_indexes = PerTenant(SearchIndex)
+catalog_cache.add_listener(search_indexes)
+mongo_search = MongoTextSearch(catalog_db)
+
+# Resume-to-roadmap/interview recommendations, rebuilt per catalog data version
+recommendation_engines = PerTenant(RecommendationEngine)
+catalog_cache.add_listener(recommendation_engines)
+
+# Spaced-repetition queues for signed-in students
+quiz_scheduler = QuizScheduler(db)
+catalog_cache.add_listener(quiz_scheduler)
+
+# Global and per-cohort leaderboards with in-memory top-k
+leaderboards = Leaderboards(db)
+
+# Per-student timelines of resume analyses, served from a covering index
+resume_history = ResumeHistory(db.resume_analyses)
+
+# Compressed archives for status checks and attempt history, deleted once archived.
+# Written by whichever worker holds the lease, so point this at a shared volume.
+RETENTION_ARCHIVE_DIR = Path(os.environ.get('RETENTION_ARCHIVE_DIR', ROOT_DIR / 'archive'))
+retention_manager = RetentionManager(db, RETENTION_ARCHIVE_DIR)
+
+# /api/stats counts per tenant, cached briefly so dashboards polling it stay cheap
+STATS_TTL_SECONDS = float(os.environ.get('TENANT_STATS_TTL_SECONDS', '30'))
+tenant_stats = TenantLRU()
 
 # Create the main app without a prefix
 app = FastAPI()
@@ -30,6 +78,34 @@ api_router = APIRouter(prefix="/api")
 
 # Gemini API Configuration
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+GEMINI_MODEL = "gemini-2.0-flash"
+
+RESUME_SYSTEM_MESSAGE = "You are an expert resume reviewer for student placements. Analyze resumes and provide detailed, actionable feedback."
+
+RESUME_ANALYSIS_PROMPT = """
+        Analyze this resume for a student seeking placement opportunities. Provide:
+        1. Overall score (1-100)
+        2. Key strengths (3-5 points)
+        3. Major weaknesses (3-5 points)
+        4. Specific improvements needed (5-7 actionable points)
+        5. Detailed analysis covering format, content, skills, experience, and presentation
+        
+        Format your response as JSON with these keys:
+        - score: integer (1-100)
+        - strengths: array of strings
+        - weaknesses: array of strings
+        - improvements: array of strings
+        - analysis: detailed string analysis
+        """
+
+# Admin endpoints are disabled unless a token is configured
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+# Batched LLM grading for mock interview practice
+interview_grader = InterviewGrader(GEMINI_API_KEY, GEMINI_MODEL)
+
+def resume_prompt(resume_text: str) -> str:
+    return f"{RESUME_ANALYSIS_PROMPT}\n        Resume text:\n{resume_text}"
 
 # Define Models
 class StatusCheck(BaseModel):
@@ -42,6 +118,7 @@ class StatusCheckCreate(BaseModel):
 
 class ResumeAnalysis(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    user_id: Optional[str] = None
     filename: str
     analysis: str
     strengths: List[str]
@@ -50,6 +127,29 @@ class ResumeAnalysis(BaseModel):
     score: int
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
+class ResumeAnalysisSummary(BaseModel):
+    id: str
+    score: int
+    timestamp: datetime
+    strengths_count: int
+    weaknesses_count: int
+    improvements_count: int
+
+class ItemDiff(BaseModel):
+    added: List[str]
+    removed: List[str]
+    kept: List[str]
+
+class ResumeComparison(BaseModel):
+    base_id: str
+    other_id: str
+    base_score: int
+    other_score: int
+    score_change: int
+    days_between: float
+    strengths: ItemDiff
+    weaknesses: ItemDiff
+
 class Quiz(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     question: str
@@ -62,6 +162,8 @@ class Quiz(BaseModel):
 class QuizAttempt(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     quiz_id: str
+    user_id: Optional[str] = None
+    cohort: Optional[str] = None
     user_answer: int
     is_correct: bool
     timestamp: datetime = Field(default_factory=datetime.utcnow)
@@ -74,12 +176,21 @@ class MockInterview(BaseModel):
     difficulty: str
     duration: str
 
+class AnswerFeedback(BaseModel):
+    question: str
+    score: int
+    feedback: str
+
 class InterviewPractice(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     interview_id: str
+    user_id: Optional[str] = None
+    cohort: Optional[str] = None
     user_responses: List[str]
     feedback: str
     score: int
+    answer_feedback: List[AnswerFeedback] = []
+    graded_by: str = "heuristic"
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 class CareerRoadmap(BaseModel):
@@ -91,6 +202,43 @@ class CareerRoadmap(BaseModel):
     timeline: str
     difficulty: str
 
+class SearchResult(BaseModel):
+    type: str
+    id: str
+    title: str
+    score: float
+
+class Recommendation(BaseModel):
+    type: str
+    id: str
+    role: str
+    score: float
+
+class ResumeRecommendations(BaseModel):
+    analysis_id: str
+    roadmaps: List[Recommendation]
+    mock_interviews: List[Recommendation]
+
+class LeaderboardEntry(BaseModel):
+    # Unset for users without enough results to rank on the metric yet
+    rank: Optional[int] = None
+    user_id: str
+    value: Optional[Union[int, float]] = None
+    quiz_attempts: int
+    quiz_accuracy: Optional[float] = None
+    interview_count: int
+    interview_average: Optional[float] = None
+
+class Leaderboard(BaseModel):
+    board: str
+    metric: str
+    refreshed_at: datetime
+    entries: List[LeaderboardEntry]
+
+class UserRank(LeaderboardEntry):
+    board: str
+    metric: str
+
 # Sample mock interview data
 MOCK_INTERVIEWS = [
     {
@@ -391,124 +539,138 @@ CAREER_ROADMAPS = [
 
 # Initialize database with sample data
 async def init_db():
-    # Check if quizzes already exist
-    existing_quizzes = await db.quizzes.count_documents({})
-    if existing_quizzes == 0:
-        quiz_objects = [Quiz(**quiz) for quiz in SAMPLE_QUIZZES]
-        await db.quizzes.insert_many([quiz.dict() for quiz in quiz_objects])
-    
-    # Check if roadmaps already exist
-    existing_roadmaps = await db.roadmaps.count_documents({})
-    if existing_roadmaps == 0:
-        roadmap_objects = [CareerRoadmap(**roadmap) for roadmap in CAREER_ROADMAPS]
-        await db.roadmaps.insert_many([roadmap.dict() for roadmap in roadmap_objects])
-    
-    # Check if mock interviews already exist
-    existing_interviews = await db.mock_interviews.count_documents({})
-    if existing_interviews == 0:
-        interview_objects = [MockInterview(**interview) for interview in MOCK_INTERVIEWS]
-        await db.mock_interviews.insert_many([interview.dict() for interview in interview_objects])
+    await seed_database(db, [
+        ("quizzes", Quiz, SAMPLE_QUIZZES, "question", quiz_hash_field),
+        ("roadmaps", CareerRoadmap, CAREER_ROADMAPS, "role"),
+        ("mock_interviews", MockInterview, MOCK_INTERVIEWS, "role"),
+    ], TENANTS)
+
+# Cohorts name a board in user_scores, so they are limited to short identifiers
+COHORT_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9 _.-]{0,63}$")
+
+def check_cohort(cohort: Optional[str]):
+    if cohort is not None and not COHORT_PATTERN.match(cohort):
+        raise HTTPException(status_code=400, detail="Invalid cohort")
+
+# Writes are rejected up front while catalog reads are served from stale data
+def require_writable():
+    if catalog_cache.read_only:
+        raise HTTPException(status_code=503, detail="Database unavailable, platform is in read-only mode")
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API is disabled")
+    if not secrets.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
 
 # Routes
 @api_router.get("/")
 async def root():
     return {"message": "AI-Powered Student Placement Prep Platform"}
 
-@api_router.post("/status", response_model=StatusCheck)
-async def create_status_check(input: StatusCheckCreate):
+@api_router.post("/status", response_model=StatusCheck, dependencies=[Depends(require_writable)])
+async def create_status_check(input: StatusCheckCreate, tenant: str = Depends(get_tenant)):
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    _ = await status_checks_collection.insert_one({**status_obj.dict(), TENANT_FIELD: tenant})
     return status_obj
 
+@api_router.get("/health")
+async def health_check():
+    health = await database_health()
+    health["startup_ms"] = startup_report
+    health["catalog_cache"] = catalog_cache.status()
+    health["resume_extraction"] = extraction_stats
+    health["interview_grading"] = interview_grader.stats
+    health["admission"] = admission_controller.status()
+    health["retention"] = retention_manager.stats
+    return health
+
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
+async def get_status_checks(tenant: str = Depends(get_tenant)):
+    status_checks = await db.status_checks.find({TENANT_FIELD: tenant}).to_list(1000)
     return [StatusCheck(**status_check) for status_check in status_checks]
 
-@api_router.post("/analyze-resume", response_model=ResumeAnalysis)
-async def analyze_resume(file: UploadFile = File(...)):
+async def read_resume_upload(file: UploadFile):
     if not GEMINI_API_KEY:
         raise HTTPException(status_code=500, detail="Gemini API key not configured")
     
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
     
+    # Read one byte past the limit so oversized uploads are rejected without buffering them whole
+    content = await file.read(MAX_PDF_BYTES + 1)
+    try:
+        resume = await extract_resume(content)
+    except ResumeRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return content, resume
+
+def parse_analysis_response(response: str) -> dict:
+    # Parse response (simplified - in production, you'd want better JSON parsing)
+    try:
+        # Try to extract JSON from response
+        if "```json" in response:
+            json_str = response.split("```json")[1].split("```")[0].strip()
+            parsed_data = json.loads(json_str)
+        else:
+            # Fallback: create structured response from text
+            parsed_data = {
+                "score": 75,
+                "strengths": ["Professional formatting", "Relevant skills listed", "Clear contact information"],
+                "weaknesses": ["Limited work experience", "Missing quantifiable achievements", "Generic objective statement"],
+                "improvements": ["Add specific metrics and achievements", "Include relevant projects", "Customize for target roles", "Add technical skills section", "Improve summary statement"],
+                "analysis": response
+            }
+    except:
+        # Final fallback
+        parsed_data = {
+            "score": 70,
+            "strengths": ["Resume uploaded successfully", "Professional appearance", "Good structure"],
+            "weaknesses": ["Could be more specific", "Add more details", "Enhance presentation"],
+            "improvements": ["Add quantifiable results", "Include relevant keywords", "Highlight achievements", "Customize for roles", "Add skills section"],
+            "analysis": response
+        }
+    return parsed_data
+
+async def save_analysis(analysis: ResumeAnalysis, tenant: str):
+    # List lengths are stored alongside so history timelines can be answered from the index
+    document = analysis.dict()
+    await db.resume_analyses.insert_one({**document, **list_counts(document), TENANT_FIELD: tenant})
+
+@api_router.post("/analyze-resume", response_model=ResumeAnalysis, dependencies=[Depends(require_writable)])
+async def analyze_resume(file: UploadFile = File(...), user_id: Optional[str] = None, tenant: str = Depends(get_tenant)):
+    content, resume = await read_resume_upload(file)
+    
+    tmp_file_path = None
     try:
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
-            tmp_file_path = tmp_file.name
-        
         # Initialize Gemini chat
-        chat = LlmChat(
+        llm = llm_chat_module()
+        chat = llm.LlmChat(
             api_key=GEMINI_API_KEY,
             session_id=str(uuid.uuid4()),
-            system_message="You are an expert resume reviewer for student placements. Analyze resumes and provide detailed, actionable feedback."
-        ).with_model("gemini", "gemini-2.0-flash")
-        
-        # Create file content object
-        pdf_file = FileContentWithMimeType(
-            file_path=tmp_file_path,
-            mime_type="application/pdf"
-        )
+            system_message=RESUME_SYSTEM_MESSAGE
+        ).with_model("gemini", GEMINI_MODEL)
         
         # Analyze resume
-        analysis_prompt = """
-        Analyze this resume for a student seeking placement opportunities. Provide:
-        1. Overall score (1-100)
-        2. Key strengths (3-5 points)
-        3. Major weaknesses (3-5 points)
-        4. Specific improvements needed (5-7 actionable points)
-        5. Detailed analysis covering format, content, skills, experience, and presentation
-        
-        Format your response as JSON with these keys:
-        - score: integer (1-100)
-        - strengths: array of strings
-        - weaknesses: array of strings
-        - improvements: array of strings
-        - analysis: detailed string analysis
-        """
-        
-        user_message = UserMessage(
-            text=analysis_prompt,
-            file_contents=[pdf_file]
-        )
+        if resume.use_pdf:
+            # Little or no text layer (e.g. a scanned resume), so the model needs the PDF itself
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
+                tmp_file.write(content)
+                tmp_file_path = tmp_file.name
+            user_message = llm.UserMessage(
+                text=RESUME_ANALYSIS_PROMPT,
+                file_contents=[llm.FileContentWithMimeType(file_path=tmp_file_path, mime_type="application/pdf")]
+            )
+        else:
+            user_message = llm.UserMessage(text=resume_prompt(resume.text))
         
         response = await chat.send_message(user_message)
-        
-        # Clean up temporary file
-        os.unlink(tmp_file_path)
-        
-        # Parse response (simplified - in production, you'd want better JSON parsing)
-        import json
-        try:
-            # Try to extract JSON from response
-            if "```json" in response:
-                json_str = response.split("```json")[1].split("```")[0].strip()
-                parsed_data = json.loads(json_str)
-            else:
-                # Fallback: create structured response from text
-                parsed_data = {
-                    "score": 75,
-                    "strengths": ["Professional formatting", "Relevant skills listed", "Clear contact information"],
-                    "weaknesses": ["Limited work experience", "Missing quantifiable achievements", "Generic objective statement"],
-                    "improvements": ["Add specific metrics and achievements", "Include relevant projects", "Customize for target roles", "Add technical skills section", "Improve summary statement"],
-                    "analysis": response
-                }
-        except:
-            # Final fallback
-            parsed_data = {
-                "score": 70,
-                "strengths": ["Resume uploaded successfully", "Professional appearance", "Good structure"],
-                "weaknesses": ["Could be more specific", "Add more details", "Enhance presentation"],
-                "improvements": ["Add quantifiable results", "Include relevant keywords", "Highlight achievements", "Customize for roles", "Add skills section"],
-                "analysis": response
-            }
+        parsed_data = parse_analysis_response(response)
         
         # Create analysis object
         analysis = ResumeAnalysis(
+            user_id=user_id,
             filename=file.filename,
             analysis=parsed_data["analysis"],
             strengths=parsed_data["strengths"],
@@ -518,31 +680,122 @@ async def analyze_resume(file: UploadFile = File(...)):
         )
         
         # Save to database
-        await db.resume_analyses.insert_one(analysis.dict())
+        await save_analysis(analysis, tenant)
         
         return analysis
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing resume: {str(e)}")
+    finally:
+        # Clean up temporary file
+        if tmp_file_path:
+            os.unlink(tmp_file_path)
+
+@api_router.post("/analyze-resume/stream", dependencies=[Depends(require_writable)])
+async def analyze_resume_stream(file: UploadFile = File(...), user_id: Optional[str] = None, tenant: str = Depends(get_tenant)):
+    """Streams the analysis as server-sent events while Gemini is still generating it.
+
+    Emits `item` for each list entry and `field` for each top-level key as soon
+    as it is complete, then `done` with the saved ResumeAnalysis (or `error`).
+    """
+    content, resume = await read_resume_upload(file)
+    prompt = RESUME_ANALYSIS_PROMPT if resume.use_pdf else resume_prompt(resume.text)
+    
+    async def events():
+        started = time.perf_counter()
+        first_content_ms = None
+        parser = IncrementalJsonParser()
+        chunks = []
+        yield sse_event("extracted", {"pages": resume.pages, "pdf_fallback": resume.use_pdf})
+        
+        try:
+            async for chunk in stream_gemini(
+                GEMINI_API_KEY,
+                GEMINI_MODEL,
+                RESUME_SYSTEM_MESSAGE,
+                prompt,
+                pdf_content=content if resume.use_pdf else None,
+            ):
+                chunks.append(chunk)
+                for kind, field, value in parser.feed(chunk):
+                    if first_content_ms is None:
+                        first_content_ms = round((time.perf_counter() - started) * 1000, 2)
+                    yield sse_event(kind, {"field": field, "value": value})
+            
+            # Fields the stream parsed cleanly win; anything missing comes from the usual fallbacks
+            response = "".join(chunks)
+            parsed_data = {**parse_analysis_response(response), **parser.fields}
+            analysis = ResumeAnalysis(
+                user_id=user_id,
+                filename=file.filename,
+                analysis=parsed_data["analysis"],
+                strengths=parsed_data["strengths"],
+                weaknesses=parsed_data["weaknesses"],
+                improvements=parsed_data["improvements"],
+                score=parsed_data["score"]
+            )
+            await save_analysis(analysis, tenant)
+        except Exception:
+            # Upstream errors can carry request details, so the client only gets a generic message
+            logger.exception("Streamed resume analysis failed")
+            yield sse_event("error", {"detail": "Error analyzing resume, please try again"})
+            return
+        
+        total_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info("Streamed resume analysis: first content after %s ms, complete after %s ms", first_content_ms, total_ms)
+        yield sse_event("done", analysis.dict())
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@api_router.get("/resume-history/{user_id}", response_model=List[ResumeAnalysisSummary])
+async def get_resume_history(user_id: str, limit: int = 20, before: Optional[datetime] = None, tenant: str = Depends(get_tenant)):
+    """Newest first; pass the oldest timestamp seen as `before` to page back further."""
+    return await resume_history.timeline(tenant, user_id, max(1, min(limit, MAX_HISTORY)), before)
+
+@api_router.get("/resume-history/{user_id}/compare", response_model=ResumeComparison)
+async def compare_resume_analyses(user_id: str, base: str, other: str, tenant: str = Depends(get_tenant)):
+    comparison = await resume_history.compare(tenant, user_id, base, other)
+    if not comparison:
+        raise HTTPException(status_code=404, detail="Resume analysis not found")
+    return comparison
+
+@api_router.get("/resume-history/{user_id}/{analysis_id}", response_model=ResumeAnalysis)
+async def get_resume_history_item(user_id: str, analysis_id: str, tenant: str = Depends(get_tenant)):
+    analysis = await resume_history.detail(tenant, user_id, analysis_id)
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Resume analysis not found")
+    return ResumeAnalysis(**analysis)
 
 @api_router.get("/quizzes", response_model=List[Quiz])
-async def get_quizzes():
-    quizzes = await db.quizzes.find().to_list(1000)
+async def get_quizzes(tenant: str = Depends(get_tenant)):
+    quizzes = await catalog_cache.documents(tenant, "quizzes")
     return [Quiz(**quiz) for quiz in quizzes]
 
 @api_router.get("/quiz/random", response_model=Quiz)
-async def get_random_quiz():
-    quizzes = await db.quizzes.find().to_list(1000)
+async def get_random_quiz(user_id: Optional[str] = None, tenant: str = Depends(get_tenant)):
+    quizzes = await catalog_cache.documents(tenant, "quizzes")
     if not quizzes:
         raise HTTPException(status_code=404, detail="No quizzes found")
     
+    if user_id:
+        # Signed-in students get their next due review or an unseen question
+        quiz_id = await quiz_scheduler.next_quiz(tenant, user_id)
+        scheduled_quiz = await catalog_cache.get(tenant, "quizzes", quiz_id) if quiz_id else None
+        if scheduled_quiz:
+            return Quiz(**scheduled_quiz)
+    
     random_quiz = random.choice(quizzes)
     return Quiz(**random_quiz)
 
-@api_router.post("/quiz/attempt", response_model=QuizAttempt)
-async def submit_quiz_attempt(quiz_id: str, user_answer: int):
+@api_router.post("/quiz/attempt", response_model=QuizAttempt, dependencies=[Depends(require_writable)])
+async def submit_quiz_attempt(quiz_id: str, user_answer: int, user_id: Optional[str] = None, cohort: Optional[str] = None, tenant: str = Depends(get_tenant)):
+    check_cohort(cohort)
     # Get quiz
-    quiz_data = await db.quizzes.find_one({"id": quiz_id})
+    quiz_data = await catalog_cache.get(tenant, "quizzes", quiz_id)
     if not quiz_data:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
@@ -552,94 +805,169 @@ async def submit_quiz_attempt(quiz_id: str, user_answer: int):
     # Create attempt
     attempt = QuizAttempt(
         quiz_id=quiz_id,
+        user_id=user_id,
+        cohort=cohort,
         user_answer=user_answer,
         is_correct=is_correct
     )
     
     # Save to database
-    await db.quiz_attempts.insert_one(attempt.dict())
+    await db.quiz_attempts.insert_one({**attempt.dict(), TENANT_FIELD: tenant})
+    if user_id:
+        await quiz_scheduler.record(tenant, user_id, quiz_id, is_correct)
+        await leaderboards.record_quiz(tenant, user_id, cohort, is_correct)
     
     return attempt
 
 @api_router.get("/roadmaps", response_model=List[CareerRoadmap])
-async def get_career_roadmaps():
-    roadmaps = await db.roadmaps.find().to_list(1000)
+async def get_career_roadmaps(tenant: str = Depends(get_tenant)):
+    roadmaps = await catalog_cache.documents(tenant, "roadmaps")
     return [CareerRoadmap(**roadmap) for roadmap in roadmaps]
 
 @api_router.get("/roadmap/{roadmap_id}", response_model=CareerRoadmap)
-async def get_roadmap_details(roadmap_id: str):
-    roadmap_data = await db.roadmaps.find_one({"id": roadmap_id})
+async def get_roadmap_details(roadmap_id: str, tenant: str = Depends(get_tenant)):
+    roadmap_data = await catalog_cache.get(tenant, "roadmaps", roadmap_id)
     if not roadmap_data:
         raise HTTPException(status_code=404, detail="Roadmap not found")
     
     return CareerRoadmap(**roadmap_data)
 
 @api_router.get("/mock-interviews", response_model=List[MockInterview])
-async def get_mock_interviews():
-    interviews = await db.mock_interviews.find().to_list(1000)
+async def get_mock_interviews(tenant: str = Depends(get_tenant)):
+    interviews = await catalog_cache.documents(tenant, "mock_interviews")
     return [MockInterview(**interview) for interview in interviews]
 
 @api_router.get("/mock-interview/{role}", response_model=MockInterview)
-async def get_mock_interview_by_role(role: str):
-    interview_data = await db.mock_interviews.find_one({"role": role})
+async def get_mock_interview_by_role(role: str, tenant: str = Depends(get_tenant)):
+    interview_data = await catalog_cache.find_one(tenant, "mock_interviews", "role", role)
     if not interview_data:
         raise HTTPException(status_code=404, detail="Mock interview not found for this role")
     
     return MockInterview(**interview_data)
 
-@api_router.post("/mock-interview/practice", response_model=InterviewPractice)
-async def submit_interview_practice(interview_id: str, user_responses: List[str]):
+@api_router.post("/mock-interview/practice", response_model=InterviewPractice, dependencies=[Depends(require_writable)])
+async def submit_interview_practice(interview_id: str, user_responses: List[str], user_id: Optional[str] = None, cohort: Optional[str] = None, tenant: str = Depends(get_tenant)):
+    check_cohort(cohort)
     # Get interview data
-    interview_data = await db.mock_interviews.find_one({"id": interview_id})
+    interview_data = await catalog_cache.get(tenant, "mock_interviews", interview_id)
     if not interview_data:
         raise HTTPException(status_code=404, detail="Interview not found")
     
-    # Simple scoring based on response length and completeness
-    total_score = 0
-    for response in user_responses:
-        if len(response.strip()) > 50:  # Decent length response
-            total_score += 15
-        elif len(response.strip()) > 20:  # Short but adequate
-            total_score += 10
-        else:  # Very short response
-            total_score += 5
-    
-    # Cap the score at 100
-    final_score = min(total_score, 100)
+    try:
+        answer_feedback = await interview_grader.grade(interview_data["role"], interview_data["questions"], user_responses)
+    except GradingUnavailable as e:
+        answer_feedback = None
+        logger.info("Using heuristic interview scoring: %s", e)
     
-    # Generate feedback based on score
-    if final_score >= 90:
-        feedback = "Excellent responses! You demonstrated strong knowledge and communication skills. Keep up the great work!"
-    elif final_score >= 70:
-        feedback = "Good responses overall. Consider providing more specific examples and details to strengthen your answers."
-    elif final_score >= 50:
-        feedback = "Decent effort. Focus on expanding your answers with more concrete examples and technical details."
+    if answer_feedback:
+        final_score = round(sum(answer["score"] for answer in answer_feedback) / len(answer_feedback))
+        feedback = "\n".join(f"Q{i}: {answer['feedback']}" for i, answer in enumerate(answer_feedback, start=1))
+        graded_by = "ai"
     else:
-        feedback = "Your responses need more depth. Practice explaining concepts clearly and provide specific examples from your experience."
+        # Instant fallback when AI grading is unavailable or saturated
+        final_score, feedback = heuristic_grade(user_responses)
+        answer_feedback = []
+        graded_by = "heuristic"
     
     # Create practice record
     practice = InterviewPractice(
         interview_id=interview_id,
+        user_id=user_id,
+        cohort=cohort,
         user_responses=user_responses,
         feedback=feedback,
-        score=final_score
+        score=final_score,
+        answer_feedback=answer_feedback,
+        graded_by=graded_by
     )
     
     # Save to database
-    await db.interview_practices.insert_one(practice.dict())
+    await db.interview_practices.insert_one({**practice.dict(), TENANT_FIELD: tenant})
+    if user_id:
+        await leaderboards.record_interview(tenant, user_id, cohort, final_score)
     
     return practice
 
+@api_router.get("/search", response_model=List[SearchResult])
+async def search_catalog(q: str, limit: int = 10, type: Optional[str] = None, tenant: str = Depends(get_tenant)):
+    if type and type not in SEARCH_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Unknown search type: {type}")
+    if not q.strip():
+        return []
+    limit = max(1, min(limit, 50))
+    collections = [type] if type else None
+
+    if SEARCH_BACKEND == "mongo":
+        results = await mongo_search.search(tenant, q, limit, collections)
+    else:
+        # Make sure every collection is loaded (and therefore indexed) before querying
+        for name in SEARCH_FIELDS:
+            await catalog_cache.ensure_loaded(tenant, name)
+        results = search_indexes[tenant].search(q, limit, collections)
+    return [SearchResult(**result) for result in results]
+
+@api_router.get("/recommendations/{analysis_id}", response_model=ResumeRecommendations)
+async def get_resume_recommendations(analysis_id: str, k: int = 3, tenant: str = Depends(get_tenant)):
+    analysis = await db.resume_analyses.find_one(
+        {TENANT_FIELD: tenant, "id": analysis_id},
+        {"_id": 0, "strengths": 1, "improvements": 1, "analysis": 1},
+    )
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Resume analysis not found")
+
+    for name in RECOMMENDATION_FIELDS:
+        await catalog_cache.ensure_loaded(tenant, name)
+    results = recommendation_engines[tenant].recommend(analysis_id, resume_text(analysis), max(1, min(k, 15)))
+    return ResumeRecommendations(analysis_id=analysis_id, **results)
+
+def leaderboard_board(cohort: Optional[str], metric: str) -> str:
+    if metric not in LEADERBOARD_METRICS:
+        raise HTTPException(status_code=400, detail=f"Unknown leaderboard metric: {metric}")
+    check_cohort(cohort)
+    return cohort_board(cohort) if cohort else GLOBAL_BOARD
+
+@api_router.get("/leaderboard", response_model=Leaderboard)
+async def get_leaderboard(cohort: Optional[str] = None, metric: str = "overall", limit: int = 20, tenant: str = Depends(get_tenant)):
+    board = leaderboard_board(cohort, metric)
+    return await leaderboards.leaderboard(tenant, board, metric, max(1, min(limit, LEADERBOARD_TOP_K)))
+
+@api_router.get("/leaderboard/rank/{user_id}", response_model=UserRank)
+async def get_leaderboard_rank(user_id: str, cohort: Optional[str] = None, metric: str = "overall", tenant: str = Depends(get_tenant)):
+    board = leaderboard_board(cohort, metric)
+    rank = await leaderboards.rank(tenant, user_id, board, metric)
+    if not rank:
+        raise HTTPException(status_code=404, detail="No scores recorded for this user")
+    return rank
+
+@api_router.post("/admin/quizzes/import", response_model=ImportReport, dependencies=[Depends(require_admin), Depends(require_writable)])
+async def import_quizzes(file: UploadFile = File(...), tenant: str = Depends(get_tenant)):
+    try:
+        fmt = detect_format(file.filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # The upload is already spooled to disk by the framework; rows are streamed from it in batches
+    report = await QuizImporter(db.quizzes, Quiz, tenant).run(iter_rows(file.file, fmt))
+    catalog_cache.invalidate("quizzes", tenant)
+    logger.info("Imported quizzes for %s from %s: %s", tenant, file.filename, report)
+    return report
+
 @api_router.get("/stats")
-async def get_platform_stats():
-    total_analyses = await db.resume_analyses.count_documents({})
-    total_attempts = await db.quiz_attempts.count_documents({})
-    total_quizzes = await db.quizzes.count_documents({})
-    total_roadmaps = await db.roadmaps.count_documents({})
-    total_interviews = await db.mock_interviews.count_documents({})
-    total_practices = await db.interview_practices.count_documents({})
+async def get_platform_stats(tenant: str = Depends(get_tenant)):
+    cached = tenant_stats.get(tenant)
+    if cached and time.monotonic() - cached[0] < STATS_TTL_SECONDS:
+        return cached[1]
+    
+    # Each count is a range scan of the tenant's entries in a tenant-prefixed index
+    scope = {TENANT_FIELD: tenant}
+    total_analyses = await analytics_db.resume_analyses.count_documents(scope)
+    total_attempts = await analytics_db.quiz_attempts.count_documents(scope)
+    total_quizzes = await analytics_db.quizzes.count_documents(scope)
+    total_roadmaps = await analytics_db.roadmaps.count_documents(scope)
+    total_interviews = await analytics_db.mock_interviews.count_documents(scope)
+    total_practices = await analytics_db.interview_practices.count_documents(scope)
     
-    return {
+    stats = {
         "total_resume_analyses": total_analyses,
         "total_quiz_attempts": total_attempts,
         "total_quizzes": total_quizzes,
@@ -647,10 +975,16 @@ async def get_platform_stats():
         "total_mock_interviews": total_interviews,
         "total_interview_practices": total_practices
     }
+    tenant_stats.set(tenant, (time.monotonic(), stats))
+    return stats
 
 # Include the router in the main app
 app.include_router(api_router)
 
+# Per-client rate limits and LLM load shedding; added before CORS so 429s still carry CORS headers
+admission_controller = AdmissionController()
+app.add_middleware(AdmissionControlMiddleware, controller=admission_controller)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -659,10 +993,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+async def ensure_indexes():
+    # Each step runs on its own so one failing index build cannot skip the others
+    steps = [
+        ("tenant", lambda: ensure_tenant_indexes(db)),
+        ("resume history", resume_history.ensure_indexes),
+        ("quiz import", QuizImporter(db.quizzes, Quiz).ensure_indexes),
+        ("quiz scheduler", quiz_scheduler.ensure_indexes),
+        ("leaderboard", leaderboards.ensure_indexes),
+        ("retention", retention_manager.ensure_indexes),
+    ]
+    if SEARCH_BACKEND == "mongo":
+        steps.append(("search", mongo_search.ensure_indexes))
+    for name, step in steps:
+        with timed(f"indexes.{name.replace(' ', '_')}"):
+            try:
+                await step()
+            except PyMongoError as e:
+                logger.error("Could not set up %s indexes: %s", name, e)
+
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
-    await init_db()
+    with timed("total"):
+        with timed("snapshot.warm_start"):
+            catalog_cache.warm_start()
+        try:
+            await assign_default_tenant(db)
+            await init_db()
+        except ConnectionFailure as e:
+            # Keep booting; catalog reads are served from the snapshot until MongoDB is back
+            logger.warning("Database seeding skipped, MongoDB unavailable: %s", e)
+        else:
+            await ensure_indexes()
+    catalog_cache.start()
+    interview_grader.start()
+    quiz_scheduler.start()
+    leaderboards.start()
+    retention_manager.start()
+    logger.info("Startup timings (ms): %s", startup_report)
 
 # Configure logging
 logging.basicConfig(
@@ -673,4 +1042,10 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await catalog_cache.stop()
+    await interview_grader.stop()
+    await quiz_scheduler.stop()
+    await leaderboards.stop()
+    await retention_manager.stop()
+    shutdown_pool()
     client.close()
\ No newline at end of file
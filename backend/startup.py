@@ -0,0 +1,113 @@
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+from typing import Callable, Optional
+import asyncio
+import logging
+import time
+import uuid
+
+from tenancy import DEFAULT_TENANT, TENANT_FIELD
+
+logger = logging.getLogger(__name__)
+
+# Fixed namespace so every worker derives the same seed id for the same document
+SEED_NAMESPACE = uuid.UUID("7d0f3c2a-5b1e-4c8e-9a57-2f4e6b1d8c90")
+
+DUPLICATE_KEY = 11000
+
+# Phase timings (milliseconds) from the most recent startup, reported by /api/health
+startup_report = {}
+
+
+def seed_id(collection_name: str, natural_key: str, tenant: str = DEFAULT_TENANT) -> str:
+    # The default tenant keeps the ids it was seeded with before tenants existed
+    if tenant != DEFAULT_TENANT:
+        natural_key = f"{tenant}:{natural_key}"
+    return str(uuid.uuid5(SEED_NAMESPACE, f"{collection_name}:{natural_key}"))
+
+
+class timed:
+    """Records the wall time of a block into startup_report under the given name."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        startup_report[self.name] = round((time.perf_counter() - self.started) * 1000, 2)
+        return False
+
+
+async def _bulk_write_ignoring_duplicates(collection, operations):
+    # Another worker seeding at the same moment can win the race for a seed id;
+    # its row is identical to ours, so duplicate-key errors are safe to drop.
+    try:
+        return await collection.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(error.get("code") != DUPLICATE_KEY for error in errors):
+            raise
+        return None
+
+
+async def seed_collection(
+    db,
+    collection_name: str,
+    model,
+    documents: list,
+    key_field: str,
+    derive: Optional[Callable[[dict], dict]] = None,
+    tenant: str = DEFAULT_TENANT,
+):
+    """Idempotently upserts the sample documents of one collection for one tenant.
+
+    Each document is keyed on a seed id derived from its natural key, so
+    restarts and concurrently starting workers converge on a single row.
+    Rows seeded before seed ids existed are adopted by their natural key.
+    `derive` adds stored fields that are not part of the model.
+    """
+    collection = db[collection_name]
+
+    with timed(f"seed.{tenant}.{collection_name}"):
+        await collection.create_index(
+            [("seed_id", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"seed_id": {"$exists": True}},
+        )
+
+        seeds = []
+        for document in documents:
+            sid = seed_id(collection_name, document[key_field], tenant)
+            row = {**model(id=sid, **document).dict(), TENANT_FIELD: tenant}
+            if derive:
+                row.update(derive(row))
+            seeds.append((sid, row))
+
+        adopt = [
+            UpdateOne(
+                {TENANT_FIELD: tenant, key_field: row[key_field], "seed_id": {"$exists": False}},
+                {"$set": {"seed_id": sid}},
+            )
+            for sid, row in seeds
+        ]
+        await _bulk_write_ignoring_duplicates(collection, adopt)
+
+        upserts = [
+            UpdateOne({"seed_id": sid}, {"$setOnInsert": {**row, "seed_id": sid}}, upsert=True)
+            for sid, row in seeds
+        ]
+        result = await _bulk_write_ignoring_duplicates(collection, upserts)
+
+    inserted = result.upserted_count if result else 0
+    if inserted:
+        logger.info("Seeded %d documents into %s for tenant %s", inserted, collection_name, tenant)
+    return inserted
+
+
+async def seed_database(db, seeds: list, tenants=(DEFAULT_TENANT,)):
+    """Seeds every (collection_name, model, documents, key_field[, derive]) entry for every tenant concurrently."""
+    with timed("seed.total"):
+        await asyncio.gather(*(seed_collection(db, *seed, tenant=tenant) for tenant in tenants for seed in seeds))
@@ -0,0 +1,169 @@
+from collections import OrderedDict
+from fastapi import Header, HTTPException
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+from typing import Callable, Dict, Iterator, Optional
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+# Every college is a tenant; requests without a tenant header belong to the default one
+DEFAULT_TENANT = os.environ.get('DEFAULT_TENANT', 'default')
+TENANTS = [tenant.strip() for tenant in os.environ.get('TENANTS', DEFAULT_TENANT).split(',') if tenant.strip()]
+MAX_CACHED_TENANTS = int(os.environ.get('TENANT_CACHE_MAX_TENANTS', 32))
+
+TENANT_FIELD = "tenant"
+TENANT_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,62}$")
+
+INDEX_NOT_FOUND = 27
+
+# Indexes that serve the per-tenant queries of each collection. The tenant is
+# always the leading key, so a tenant's reads never touch other tenants' entries.
+TENANT_INDEXES = {
+    "quizzes": [[(TENANT_FIELD, ASCENDING), ("id", ASCENDING)]],
+    "roadmaps": [[(TENANT_FIELD, ASCENDING), ("id", ASCENDING)]],
+    "mock_interviews": [[(TENANT_FIELD, ASCENDING), ("id", ASCENDING)]],
+    "status_checks": [[(TENANT_FIELD, ASCENDING), ("timestamp", DESCENDING)]],
+    "resume_analyses": [[(TENANT_FIELD, ASCENDING), ("id", ASCENDING)]],
+    "quiz_attempts": [[(TENANT_FIELD, ASCENDING), ("timestamp", DESCENDING)]],
+    "interview_practices": [[(TENANT_FIELD, ASCENDING), ("timestamp", DESCENDING)]],
+}
+# Every tenant-scoped collection; quiz_schedules and user_scores create their own indexes
+TENANT_COLLECTIONS = tuple(TENANT_INDEXES) + ("quiz_schedules", "user_scores")
+
+
+def get_tenant(x_tenant_id: Optional[str] = Header(None)) -> str:
+    tenant = (x_tenant_id or DEFAULT_TENANT).strip().lower()
+    if not TENANT_PATTERN.match(tenant):
+        raise HTTPException(status_code=400, detail="Invalid tenant id")
+    if tenant not in TENANTS:
+        raise HTTPException(status_code=404, detail="Unknown tenant")
+    return tenant
+
+
+def tenant_of(doc: dict) -> str:
+    # Documents written before tenants existed belong to the default tenant
+    return doc.get(TENANT_FIELD, DEFAULT_TENANT)
+
+
+async def drop_index_if_exists(collection, name: str):
+    try:
+        await collection.drop_index(name)
+    except OperationFailure as e:
+        if e.code != INDEX_NOT_FOUND:
+            raise
+
+
+async def assign_default_tenant(db):
+    """Moves documents written before tenants existed into the default tenant."""
+    for name in TENANT_COLLECTIONS:
+        result = await db[name].update_many(
+            {TENANT_FIELD: {"$exists": False}},
+            {"$set": {TENANT_FIELD: DEFAULT_TENANT}},
+        )
+        if result.modified_count:
+            logger.info("Assigned %d %s documents to tenant %s", result.modified_count, name, DEFAULT_TENANT)
+
+
+async def ensure_tenant_indexes(db):
+    for name, indexes in TENANT_INDEXES.items():
+        for keys in indexes:
+            await db[name].create_index(keys)
+
+
+class TenantLRU:
+    """Per-tenant values, evicting the least recently used tenants past max_tenants.
+
+    Whole tenants are evicted, never parts of one, so a tenant with a large
+    catalog takes a single slot and cannot crowd out a small tenant's entries.
+    Tenants for which `pinned` returns true are skipped by eviction.
+    """
+
+    def __init__(
+        self,
+        max_tenants: int = MAX_CACHED_TENANTS,
+        pinned: Optional[Callable[[str, object], bool]] = None,
+        on_evict: Optional[Callable[[str, object], None]] = None,
+    ):
+        self.max_tenants = max_tenants
+        self.pinned = pinned
+        self.on_evict = on_evict
+        self._values: "OrderedDict[str, object]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, tenant: str):
+        return tenant in self._values
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._values))
+
+    def items(self):
+        return list(self._values.items())
+
+    def get(self, tenant: str, default=None):
+        value = self._values.get(tenant, default)
+        if tenant in self._values:
+            self._values.move_to_end(tenant)
+        return value
+
+    def peek(self, tenant: str, default=None):
+        """Like get(), without counting as a use."""
+        return self._values.get(tenant, default)
+
+    def set(self, tenant: str, value):
+        self._values[tenant] = value
+        self._values.move_to_end(tenant)
+        self._evict(keep=tenant)
+
+    def pop(self, tenant: str, default=None):
+        return self._values.pop(tenant, default)
+
+    def _evict(self, keep: str):
+        excess = len(self._values) - self.max_tenants
+        for tenant in list(self._values):
+            if excess <= 0:
+                break
+            value = self._values[tenant]
+            if tenant == keep or (self.pinned and self.pinned(tenant, value)):
+                continue
+            del self._values[tenant]
+            excess -= 1
+            if self.on_evict:
+                self.on_evict(tenant, value)
+
+
+class PerTenant:
+    """Catalog cache listener that keeps one instance of a listener class per tenant.
+
+    Instances follow the catalog cache: one is created when a tenant's catalog
+    is first loaded and dropped when the cache evicts that tenant.
+    """
+
+    def __init__(self, factory: Callable[[], object]):
+        self.factory = factory
+        self.tenants: Dict[str, object] = {}
+
+    def __getitem__(self, tenant: str):
+        # Tenants the cache has not loaded yet get an empty, untracked instance
+        listener = self.tenants.get(tenant)
+        return listener if listener is not None else self.factory()
+
+    def _listener(self, tenant: str):
+        listener = self.tenants.get(tenant)
+        if listener is None:
+            listener = self.tenants[tenant] = self.factory()
+        return listener
+
+    # Catalog cache listener interface
+    def catalog_reloaded(self, tenant: str, collection: str, documents):
+        self._listener(tenant).catalog_reloaded(collection, documents)
+
+    def catalog_changed(self, tenant: str, collection: str, old, new):
+        self._listener(tenant).catalog_changed(collection, old, new)
+
+    def catalog_evicted(self, tenant: str):
+        self.tenants.pop(tenant, None)
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Load test for the AI-Powered Student Placement Prep Platform API.
+
+Virtual users replay the journeys of frontend/src/App.js concurrently: opening
+the dashboard (stats), quiz sessions of random quizzes and attempts, browsing
+career roadmaps and submitting mock interview practices. The number of active
+users follows a ramp profile, and the run ends with latency percentiles and
+error rates per endpoint.
+
+    python load_test.py --base-url http://localhost:8001 --users 200 --profile ramp --ramp-up 60 --duration 180
+
+Every virtual user sends its own X-Forwarded-For address. Start the backend
+with ADMISSION_TRUST_FORWARDED_FOR=true to rate-limit them as separate
+students; otherwise all of them share one client budget and most requests
+are answered with 429 (reported as throttled, not as errors).
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+DEFAULT_BASE_URL = "http://localhost:8001"
+
+# Relative frequency of each journey after the dashboard has loaded
+DEFAULT_MIX = {"quiz": 5, "roadmaps": 2, "interview": 1, "stats": 1}
+
+INTERVIEW_ANSWERS = [
+    "In my final year project I built a REST API with FastAPI and MongoDB, and wrote tests for every endpoint.",
+    "I would start by reproducing the issue, then add logging around the failing code path and bisect recent changes.",
+    "I prefer Python because its standard library and ecosystem let me prototype quickly and keep code readable.",
+    "I keep up with new technologies through open source contributions, technical blogs and small side projects.",
+    "I would clarify the requirements first, then break the work into small milestones and review progress with the team.",
+]
+
+
+# Load backend URL from frontend .env, like backend_test.py
+def load_backend_url():
+    frontend_env_path = Path(__file__).parent / "frontend" / ".env"
+    if frontend_env_path.exists():
+        with open(frontend_env_path, 'r') as f:
+            for line in f:
+                if line.startswith('REACT_APP_BACKEND_URL='):
+                    return line.split('=', 1)[1].strip()
+    return None
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(latencies, requests, errors, throttled, seconds):
+    ordered = sorted(latencies)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throttled": throttled,
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "throttle_rate": round(throttled / requests, 4) if requests else 0.0,
+        "rps": round(requests / seconds, 2) if seconds else 0.0,
+        "p50_ms": percentile(ordered, 0.50),
+        "p90_ms": percentile(ordered, 0.90),
+        "p95_ms": percentile(ordered, 0.95),
+        "p99_ms": percentile(ordered, 0.99),
+        "max_ms": ordered[-1] if ordered else None,
+    }
+
+
+class Stats:
+    """Latencies and outcomes per endpoint, plus a rolling window for progress lines."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.requests = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.throttled = defaultdict(int)
+        self.error_samples = defaultdict(lambda: defaultdict(int))
+        self.window = []
+        self.timeline = []
+
+    def record(self, name, status, latency_ms, error=None):
+        latency_ms = round(latency_ms, 2)
+        self.requests[name] += 1
+        self.latencies[name].append(latency_ms)
+        if status == 429:
+            outcome = "throttled"
+            self.throttled[name] += 1
+        elif error is not None or status >= 400:
+            outcome = "error"
+            self.errors[name] += 1
+            self.error_samples[name][error or f"HTTP {status}"] += 1
+        else:
+            outcome = "ok"
+        self.window.append((latency_ms, outcome))
+
+    def flush_window(self, elapsed, active_users, seconds):
+        window, self.window = self.window, []
+        latencies = [latency for latency, _ in window]
+        errors = sum(1 for _, outcome in window if outcome == "error")
+        throttled = sum(1 for _, outcome in window if outcome == "throttled")
+        point = {"elapsed_s": round(elapsed, 1), "users": active_users, **summarize(latencies, len(window), errors, throttled, seconds)}
+        self.timeline.append(point)
+        return point
+
+    def report(self, seconds):
+        endpoints = {
+            name: {
+                **summarize(self.latencies[name], self.requests[name], self.errors[name], self.throttled[name], seconds),
+                "error_samples": dict(self.error_samples[name]),
+            }
+            for name in sorted(self.requests)
+        }
+        all_latencies = [latency for values in self.latencies.values() for latency in values]
+        total = summarize(
+            all_latencies,
+            sum(self.requests.values()),
+            sum(self.errors.values()),
+            sum(self.throttled.values()),
+            seconds,
+        )
+        return {"duration_s": round(seconds, 1), "total": total, "endpoints": endpoints, "timeline": self.timeline}
+
+
+# Ramp profiles: target number of active users at `elapsed` seconds into the run
+def constant_profile(elapsed, args):
+    return args.users
+
+
+def ramp_profile(elapsed, args):
+    if args.ramp_up <= 0:
+        return args.users
+    return min(args.users, math.ceil(args.users * elapsed / args.ramp_up))
+
+
+def step_profile(elapsed, args):
+    step_seconds = args.ramp_up / args.steps if args.ramp_up > 0 else 0
+    step = args.steps if not step_seconds else min(args.steps, int(elapsed // step_seconds) + 1)
+    return math.ceil(args.users * step / args.steps)
+
+
+def spike_profile(elapsed, args):
+    # A tenth of the users, with everyone arriving at once during the middle third of the run
+    third = args.duration / 3
+    if third <= elapsed < 2 * third:
+        return args.users
+    return max(1, args.users // 10)
+
+
+PROFILES = {
+    "constant": constant_profile,
+    "ramp": ramp_profile,
+    "step": step_profile,
+    "spike": spike_profile,
+}
+
+
+class VirtualUser:
+    """One student clicking through the app, with think time between actions."""
+
+    def __init__(self, index, client, stats, args, run):
+        self.index = index
+        self.client = client
+        self.stats = stats
+        self.args = args
+        self.run = run
+        self.user_id = f"load-{run['id']}-{index}"
+        self.cohort = f"load-cohort-{index % args.cohorts}" if args.cohorts else None
+        self.headers = {"X-Forwarded-For": f"10.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}"}
+        if args.tenant:
+            self.headers["X-Tenant-ID"] = args.tenant
+
+    async def request(self, name, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, headers=self.headers, **kwargs)
+        except httpx.HTTPError as e:
+            self.stats.record(name, None, (time.perf_counter() - started) * 1000, type(e).__name__)
+            return None
+        self.stats.record(name, response.status_code, (time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            return None
+        return response.json()
+
+    async def think(self):
+        if self.args.think_time > 0:
+            await asyncio.sleep(random.expovariate(1 / self.args.think_time))
+
+    def user_params(self):
+        params = {"user_id": self.user_id}
+        if self.cohort:
+            params["cohort"] = self.cohort
+        return params
+
+    async def view_stats(self):
+        await self.request("GET /stats", "GET", "/stats")
+
+    async def take_quizzes(self):
+        for _ in range(random.randint(1, self.args.quiz_length)):
+            quiz = await self.request("GET /quiz/random", "GET", "/quiz/random", params=self.user_params())
+            if not quiz:
+                return
+            await self.think()
+            params = {"quiz_id": quiz["id"], "user_answer": random.randrange(len(quiz["options"])), **self.user_params()}
+            await self.request("POST /quiz/attempt", "POST", "/quiz/attempt", params=params)
+            await self.think()
+
+    async def browse_roadmaps(self):
+        roadmaps = await self.request("GET /roadmaps", "GET", "/roadmaps")
+        if not roadmaps:
+            return
+        await self.think()
+        roadmap = random.choice(roadmaps)
+        await self.request("GET /roadmap/{id}", "GET", f"/roadmap/{roadmap['id']}")
+
+    async def practice_interview(self):
+        interviews = await self.request("GET /mock-interviews", "GET", "/mock-interviews")
+        if not interviews:
+            return
+        interview = random.choice(interviews)
+        responses = []
+        for _ in interview["questions"]:
+            await self.think()
+            responses.append(random.choice(INTERVIEW_ANSWERS))
+        params = {"interview_id": interview["id"], **self.user_params()}
+        await self.request("POST /mock-interview/practice", "POST", "/mock-interview/practice", params=params, json=responses)
+
+    async def session(self):
+        # The app loads the dashboard stats first, then the student picks a section
+        await self.view_stats()
+        await self.think()
+        journeys = {
+            "quiz": self.take_quizzes,
+            "roadmaps": self.browse_roadmaps,
+            "interview": self.practice_interview,
+            "stats": self.view_stats,
+        }
+        names = list(self.args.mix)
+        journey = random.choices(names, weights=[self.args.mix[name] for name in names])[0]
+        await journeys[journey]()
+        await self.think()
+
+    async def loop(self):
+        while not self.run["stopping"]:
+            # Users above the profile's current target sit idle until it rises again
+            if self.index >= self.run["target"]:
+                await asyncio.sleep(0.2)
+                continue
+            await self.session()
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown journey {name!r}, expected one of {', '.join(DEFAULT_MIX)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def format_ms(value):
+    return "-" if value is None else f"{value:.1f}"
+
+
+def print_progress(point):
+    print(
+        f"[{point['elapsed_s']:>6.1f}s] users={point['users']:<5} rps={point['rps']:<8} "
+        f"p50={format_ms(point['p50_ms'])}ms p95={format_ms(point['p95_ms'])}ms "
+        f"errors={point['error_rate']:.2%} throttled={point['throttle_rate']:.2%}",
+        flush=True,
+    )
+
+
+def print_report(report):
+    print("\n" + "=" * 110)
+    print(f"{'endpoint':<30}{'requests':>9}{'rps':>9}{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}{'max':>10}{'errors':>9}{'throttled':>11}")
+    print("-" * 110)
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["total"])]
+    for name, row in rows:
+        print(
+            f"{name:<30}{row['requests']:>9}{row['rps']:>9}{format_ms(row['p50_ms']):>9}{format_ms(row['p90_ms']):>9}"
+            f"{format_ms(row['p95_ms']):>9}{format_ms(row['p99_ms']):>9}{format_ms(row['max_ms']):>10}"
+            f"{row['error_rate']:>9.2%}{row['throttle_rate']:>11.2%}"
+        )
+    print("=" * 110)
+    for name, row in report["endpoints"].items():
+        for error, count in row.get("error_samples", {}).items():
+            print(f"  {name}: {error} x{count}")
+
+
+async def run_load(args):
+    stats = Stats()
+    profile = PROFILES[args.profile]
+    run = {"id": format(random.getrandbits(32), "08x"), "target": 0, "stopping": False}
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+
+    async with httpx.AsyncClient(base_url=f"{args.base_url.rstrip('/')}/api", timeout=args.timeout, limits=limits) as client:
+        users = []
+        started = time.monotonic()
+        last_report = started
+        while (now := time.monotonic()) - started < args.duration:
+            run["target"] = min(args.users, profile(now - started, args))
+            while len(users) < run["target"]:
+                user = VirtualUser(len(users), client, stats, args, run)
+                users.append(asyncio.create_task(user.loop()))
+            if now - last_report >= args.report_interval:
+                active = min(run["target"], len(users))
+                print_progress(stats.flush_window(now - started, active, now - last_report))
+                last_report = now
+            await asyncio.sleep(0.1)
+
+        # Let in-flight journeys finish their current request, then stop everyone
+        run["stopping"] = True
+        if users:
+            _, pending = await asyncio.wait(users, timeout=args.timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        elapsed = time.monotonic() - started
+
+    if stats.window:
+        print_progress(stats.flush_window(elapsed, min(run["target"], len(users)), time.monotonic() - last_report))
+    return stats.report(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay concurrent student journeys against the placement prep API.")
+    parser.add_argument("--base-url", default=load_backend_url() or DEFAULT_BASE_URL, help="Backend URL without /api")
+    parser.add_argument("--users", type=int, default=50, help="Peak number of concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="Length of the run in seconds")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="ramp", help="How the number of active users changes over time")
+    parser.add_argument("--ramp-up", type=float, default=30, help="Seconds to reach --users (ramp and step profiles)")
+    parser.add_argument("--steps", type=int, default=4, help="Number of steps for the step profile")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean pause between a user's actions, in seconds (0 disables)")
+    parser.add_argument("--quiz-length", type=int, default=10, help="Maximum quizzes answered per quiz session")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="Journey weights, e.g. quiz=5,roadmaps=2,interview=1,stats=1")
+    parser.add_argument("--cohorts", type=int, default=4, help="Spread users over this many leaderboard cohorts (0 for none)")
+    parser.add_argument("--tenant", help="Send requests as this tenant (X-Tenant-ID)")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds")
+    parser.add_argument("--report-interval", type=float, default=10, help="Seconds between progress lines")
+    parser.add_argument("--json", type=Path, help="Also write the full report, including the timeline, to this file")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Exit with status 1 above this overall error rate")
+    args = parser.parse_args()
+
+    print(f"🔗 Load testing {args.base_url}/api: {args.users} users, {args.profile} profile, {args.duration:.0f}s")
+    print("=" * 110)
+    report = asyncio.run(run_load(args))
+    print_report(report)
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.json}")
+
+    error_rate = report["total"]["error_rate"]
+    if error_rate > args.max_error_rate:
+        print(f"❌ Error rate {error_rate:.2%} is above {args.max_error_rate:.2%}")
+        return False
+    print(f"✅ Error rate {error_rate:.2%} is within {args.max_error_rate:.2%}")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The backend modules import each other as top-level modules, as they do when run from backend/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
@@ -0,0 +1,40 @@
+import pytest
+
+from admission import TokenBuckets
+
+
+def test_burst_then_retry_after():
+    buckets = TokenBuckets(rate=2, burst=3)
+    assert [buckets.take("a", 0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert buckets.take("a", 0.0) == pytest.approx(0.5)
+    # A rejected request does not consume a token
+    assert buckets.take("a", 0.25) == pytest.approx(0.25)
+
+
+def test_refill_is_capped_at_the_burst():
+    buckets = TokenBuckets(rate=2, burst=3)
+    for _ in range(3):
+        buckets.take("a", 0.0)
+    assert buckets.take("a", 0.5) == 0.0
+    assert buckets.take("a", 0.5) > 0
+    for _ in range(3):
+        assert buckets.take("a", 100.0) == 0.0
+    assert buckets.take("a", 100.0) > 0
+
+
+def test_clients_have_separate_buckets():
+    buckets = TokenBuckets(rate=1, burst=1)
+    assert buckets.take("a", 0.0) == 0.0
+    assert buckets.take("a", 0.0) > 0
+    assert buckets.take("b", 0.0) == 0.0
+
+
+def test_full_idle_buckets_are_swept_past_the_limit():
+    buckets = TokenBuckets(rate=1, burst=2, max_clients=2)
+    buckets.take("a", 0.0)
+    buckets.take("b", 0.0)
+    buckets.take("c", 10.0)
+    assert set(buckets.buckets) == {"c"}
+    # A swept client starts again with a full bucket
+    assert buckets.take("a", 10.0) == 0.0
+    assert buckets.take("a", 10.0) == 0.0
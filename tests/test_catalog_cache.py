@@ -0,0 +1,225 @@
+import asyncio
+import time
+
+from pymongo.errors import ServerSelectionTimeoutError
+
+import catalog_cache
+from catalog_cache import CatalogCache
+
+SELECTION_TIMEOUT = 0.2
+
+
+class Query:
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def to_list(self, length):
+        self.collection.finds += 1
+        if self.collection.down:
+            await asyncio.sleep(SELECTION_TIMEOUT)
+            raise ServerSelectionTimeoutError("no servers")
+        return [dict(doc) for doc in self.collection.docs]
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.down = False
+        self.finds = 0
+
+    def find(self, query):
+        return Query(self)
+
+
+def test_degraded_reads_do_not_wait_for_mongodb(monkeypatch):
+    monkeypatch.setattr(catalog_cache, "DEGRADED_RETRY_SECONDS", 0.05)
+    quizzes = FakeCollection([{"_id": 1, "id": "q1", "tenant": "t1"}])
+    cache = CatalogCache({"quizzes": quizzes}, collections=("quizzes",))
+    cache.ttl_seconds = 0.01
+
+    async def run():
+        assert [doc["id"] for doc in await cache.documents("t1", "quizzes")] == ["q1"]
+        quizzes.down = True
+        await asyncio.sleep(0.02)
+        # The first failure is waited for; it is what detects the outage
+        assert await cache.get("t1", "quizzes", "q1") is not None
+        assert cache.read_only
+
+        slowest = 0.0
+        for _ in range(30):
+            started = time.monotonic()
+            assert await cache.get("t1", "quizzes", "q1") is not None
+            slowest = max(slowest, time.monotonic() - started)
+            await asyncio.sleep(0.02)
+        assert slowest < SELECTION_TIMEOUT / 4
+        # Retries run in the background, one at a time
+        assert 2 <= quizzes.finds <= 2 + 30 * 0.02 / SELECTION_TIMEOUT + 1
+
+        quizzes.down = False
+        quizzes.docs.append({"_id": 2, "id": "q2", "tenant": "t1"})
+        await asyncio.sleep(SELECTION_TIMEOUT + 0.1)
+        await cache.get("t1", "quizzes", "q1")
+        await asyncio.sleep(0.01)
+        assert not cache.read_only
+        assert await cache.get("t1", "quizzes", "q2") is not None
+        await cache.stop()
+
+    asyncio.run(run())
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+
+    def catalog_reloaded(self, tenant, name, documents):
+        self.events.append(("reloaded", tenant, name, [doc["id"] for doc in documents]))
+
+    def catalog_changed(self, tenant, name, old, new):
+        self.events.append(("changed", tenant, name, old and old["id"], new and new["id"]))
+
+    def catalog_evicted(self, tenant):
+        self.events.append(("evicted", tenant))
+
+
+def loaded_cache(partitions):
+    cache = CatalogCache(None, collections=("quizzes",))
+    recorder = Recorder()
+    for tenant, docs in partitions.items():
+        cache._reloaded(tenant, "quizzes", docs)
+        cache._partition(tenant, "quizzes").loaded_at = time.monotonic()
+    cache.add_listener(recorder)
+    return cache, recorder
+
+
+def change(operation, key, document=None, coll="quizzes"):
+    event = {"operationType": operation, "ns": {"db": "test", "coll": coll}, "documentKey": {"_id": key}}
+    if document is not None:
+        event["fullDocument"] = document
+    return event
+
+
+def cached_ids(cache, tenant):
+    return sorted(cache._tenants.peek(tenant)["quizzes"].by_id)
+
+
+def test_insert_goes_to_the_documents_tenant():
+    cache, recorder = loaded_cache({"t1": [], "t2": []})
+    cache.apply_change(change("insert", 1, {"_id": 1, "id": "q1", "tenant": "t2"}))
+    assert cached_ids(cache, "t1") == []
+    assert cached_ids(cache, "t2") == ["q1"]
+    assert recorder.events == [("changed", "t2", "quizzes", None, "q1")]
+
+
+def test_changes_for_unloaded_tenants_are_ignored():
+    cache, recorder = loaded_cache({"t1": []})
+    cache.apply_change(change("insert", 1, {"_id": 1, "id": "q1", "tenant": "t9"}))
+    cache.apply_change(change("delete", 2))
+    cache.apply_change(change("insert", 3, {"_id": 3, "id": "r1", "tenant": "t1"}, coll="roadmaps"))
+    assert cache._tenants.peek("t9") is None
+    assert cached_ids(cache, "t1") == []
+    assert recorder.events == []
+
+
+def test_delete_is_looked_up_by_owner():
+    cache, recorder = loaded_cache({
+        "t1": [{"_id": 1, "id": "q1", "tenant": "t1"}],
+        "t2": [{"_id": 2, "id": "q1", "tenant": "t2"}],
+    })
+    cache.apply_change(change("delete", 2))
+    assert cached_ids(cache, "t1") == ["q1"]
+    assert cached_ids(cache, "t2") == []
+    assert recorder.events == [("changed", "t2", "quizzes", "q1", None)]
+
+
+def test_update_within_a_tenant_replaces_the_document():
+    cache, recorder = loaded_cache({"t1": [{"_id": 1, "id": "q1", "tenant": "t1"}]})
+    cache.apply_change(change("update", 1, {"_id": 1, "id": "q1b", "tenant": "t1"}))
+    assert cached_ids(cache, "t1") == ["q1b"]
+    assert recorder.events == [("changed", "t1", "quizzes", "q1", "q1b")]
+
+
+def test_update_moving_a_document_between_tenants():
+    cache, recorder = loaded_cache({"t1": [{"_id": 1, "id": "q1", "tenant": "t1"}], "t2": []})
+    cache.apply_change(change("replace", 1, {"_id": 1, "id": "q1", "tenant": "t2"}))
+    assert cached_ids(cache, "t1") == []
+    assert cached_ids(cache, "t2") == ["q1"]
+    assert recorder.events == [
+        ("changed", "t1", "quizzes", "q1", None),
+        ("changed", "t2", "quizzes", None, "q1"),
+    ]
+
+
+def test_update_moving_a_document_to_an_unloaded_tenant():
+    cache, recorder = loaded_cache({"t1": [{"_id": 1, "id": "q1", "tenant": "t1"}]})
+    cache.apply_change(change("update", 1, {"_id": 1, "id": "q1", "tenant": "t9"}))
+    assert cached_ids(cache, "t1") == []
+    assert cache._tenants.peek("t9") is None
+    assert recorder.events == [("changed", "t1", "quizzes", "q1", None)]
+
+
+def test_update_of_a_deleted_document_removes_it():
+    cache, recorder = loaded_cache({"t1": [{"_id": 1, "id": "q1", "tenant": "t1"}]})
+    cache.apply_change(change("update", 1))
+    assert cached_ids(cache, "t1") == []
+    assert recorder.events == [("changed", "t1", "quizzes", "q1", None)]
+
+
+def test_drop_and_invalidate_mark_partitions_stale():
+    cache, _ = loaded_cache({"t1": [{"_id": 1, "id": "q1", "tenant": "t1"}]})
+    cache.apply_change(change("drop", None))
+    partition = cache._tenants.peek("t1")["quizzes"]
+    assert partition.loaded_at is None
+    # The documents stay as the fallback for degraded reads
+    assert cached_ids(cache, "t1") == ["q1"]
+
+
+class FakeStream:
+    def __init__(self, events):
+        self.events = events
+        self.resume_token = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.events:
+            raise StopAsyncIteration
+        event = self.events.pop(0)
+        self.resume_token = event["_id"]
+        return event
+
+
+class WatchedDb:
+    def __init__(self, streams):
+        self.streams = streams
+        self.resume_points = []
+
+    def watch(self, pipeline, full_document=None, resume_after=None):
+        self.resume_points.append(resume_after)
+        if not self.streams:
+            raise asyncio.CancelledError
+        return FakeStream(self.streams.pop(0))
+
+
+def test_stream_reopens_without_a_token_after_invalidate(monkeypatch):
+    monkeypatch.setattr(catalog_cache, "RECONNECT_DELAY_SECONDS", 0)
+    insert = dict(change("insert", 1, {"_id": 1, "id": "q1", "tenant": "t1"}), _id="token-1")
+    invalidate = {"_id": "token-2", "operationType": "invalidate"}
+    db = WatchedDb([[insert, invalidate], [insert]])
+    cache = CatalogCache(db, collections=("quizzes",))
+
+    async def run():
+        try:
+            await cache._watch()
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+    # Ended normally after the second stream: resumes after its last event
+    assert db.resume_points == [None, None, "token-1"]
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import time
+
+from catalog_cache import CatalogCache
+from catalog_snapshot import merge_snapshot, read_snapshot
+
+
+def doc(_id, tenant, **fields):
+    return {"_id": _id, "id": str(_id), "tenant": tenant, **fields}
+
+
+def partitions_in(path):
+    _, collections = read_snapshot(path)
+    found = {}
+    for name, docs in collections.items():
+        for d in docs:
+            found.setdefault((d["tenant"], name), set()).add(d["_id"])
+    return found
+
+
+def test_writers_only_replace_their_own_partitions(tmp_path):
+    path = tmp_path / "snapshot.bson"
+    # Worker A holds t1; worker B holds t2 and only the quizzes of t1
+    merge_snapshot(path, {("t1", "quizzes"): [doc(1, "t1"), doc(2, "t1")], ("t1", "roadmaps"): [doc(3, "t1")]})
+    merge_snapshot(path, {("t2", "quizzes"): [doc(4, "t2")], ("t1", "quizzes"): [doc(1, "t1")]})
+    assert partitions_in(path) == {
+        ("t1", "quizzes"): {1},
+        ("t1", "roadmaps"): {3},
+        ("t2", "quizzes"): {4},
+    }
+    # An empty partition is a partition whose documents were all deleted
+    merge_snapshot(path, {("t2", "quizzes"): []})
+    assert ("t2", "quizzes") not in partitions_in(path)
+    assert partitions_in(path)[("t1", "roadmaps")] == {3}
+
+
+def test_unchanged_merge_does_not_rewrite(tmp_path):
+    path = tmp_path / "snapshot.bson"
+    assert merge_snapshot(path, {("t1", "quizzes"): [doc(1, "t1")]})
+    assert merge_snapshot(path, {("t1", "quizzes"): [doc(1, "t1")]}) is None
+
+
+def test_concurrent_writers_lose_nothing(tmp_path):
+    path = tmp_path / "snapshot.bson"
+    tenants = [f"t{i}" for i in range(8)]
+    threads = [
+        threading.Thread(target=merge_snapshot, args=(path, {(tenant, "quizzes"): [doc(i, tenant)]}))
+        for i, tenant in enumerate(tenants)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert partitions_in(path) == {(tenant, "quizzes"): {i} for i, tenant in enumerate(tenants)}
+
+
+def test_cache_round_trip_keeps_other_workers_tenants(tmp_path):
+    path = tmp_path / "snapshot.bson"
+    merge_snapshot(path, {("other", "quizzes"): [doc(9, "other")]})
+
+    cache = CatalogCache(None, collections=("quizzes", "roadmaps"), snapshot_path=path)
+    cache._reloaded("t1", "quizzes", [doc(1, "t1")])
+    cache._partition("t1", "quizzes").loaded_at = time.monotonic()
+    cache._changes += 1
+    asyncio.run(cache.save_snapshot())
+
+    warm = CatalogCache(None, collections=("quizzes", "roadmaps"), snapshot_path=path)
+    assert warm.warm_start()
+    assert sorted(warm._tenants) == ["other", "t1"]
+    # roadmaps of t1 were never loaded, so nothing was written for them
+    assert partitions_in(path) == {("other", "quizzes"): {9}, ("t1", "quizzes"): {1}}
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+import interview_grading
+from interview_grading import GradingUnavailable, InterviewGrader
+
+QUESTIONS = ["What is a closure?", "Explain REST."]
+
+
+def grader(monkeypatch):
+    batches = []
+
+    async def grade_batch(self, role, pairs):
+        batches.append(pairs)
+        return {i: {"score": 80, "feedback": "Good"} for i in range(len(pairs))}
+
+    monkeypatch.setattr(InterviewGrader, "_grade_batch", grade_batch)
+    return InterviewGrader("key", "model"), batches
+
+
+def test_more_answers_than_questions_fall_back_without_reaching_the_pool(monkeypatch):
+    async def run():
+        g, batches = grader(monkeypatch)
+        g.start()
+        try:
+            with pytest.raises(GradingUnavailable):
+                await g.grade("SWE", QUESTIONS, ["a", "b", "c"])
+            assert g.queue.qsize() == 0
+            assert batches == []
+        finally:
+            await g.stop()
+
+    asyncio.run(run())
+
+
+def test_long_answers_are_clipped(monkeypatch):
+    monkeypatch.setattr(interview_grading, "MAX_ANSWER_CHARS", 10)
+
+    async def run():
+        g, batches = grader(monkeypatch)
+        g.start()
+        try:
+            graded = await g.grade("SWE", QUESTIONS, ["x" * 1000, "short"])
+        finally:
+            await g.stop()
+        assert batches == [[(QUESTIONS[0], "x" * 10), (QUESTIONS[1], "short")]]
+        assert [entry["question"] for entry in graded] == QUESTIONS
+
+    asyncio.run(run())
+
+
+def test_cached_answers_skip_the_model(monkeypatch):
+    async def run():
+        g, batches = grader(monkeypatch)
+        g.start()
+        try:
+            await g.grade("SWE", QUESTIONS[:1], ["A function with its scope"])
+            graded = await g.grade("SWE", QUESTIONS, ["a  function with its SCOPE", "Resources over HTTP"])
+        finally:
+            await g.stop()
+        assert batches[1] == [(QUESTIONS[1], "Resources over HTTP")]
+        assert g.stats["cache_hits"] == 1
+        assert len(graded) == 2
+
+    asyncio.run(run())
@@ -0,0 +1,113 @@
+import asyncio
+
+from leaderboard import DERIVED_FIELDS, GLOBAL_BOARD, Leaderboards, cohort_board
+
+
+def matches(doc, query):
+    for field, condition in query.items():
+        value = doc.get(field)
+        if isinstance(condition, dict):
+            if "$ne" in condition and value == condition["$ne"]:
+                return False
+            if "$gt" in condition and (value is None or not value > condition["$gt"]):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class Query:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.docs.sort(key=lambda doc: doc.get(field), reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, length):
+        return self.docs
+
+
+class FakeUserScores:
+    def __init__(self, docs):
+        self.docs = docs
+        self.writes = []
+
+    def find(self, query, projection=None):
+        return Query([doc for doc in self.docs if matches(doc, query)])
+
+    async def find_one(self, query, projection=None):
+        return next((doc for doc in self.docs if matches(doc, query)), None)
+
+    async def count_documents(self, query):
+        return sum(1 for doc in self.docs if matches(doc, query))
+
+    async def bulk_write(self, operations, ordered=True):
+        self.writes.append((operations, ordered))
+
+
+class FakeDb:
+    def __init__(self, collection):
+        self.user_scores = collection
+
+
+def row(user_id, correct, attempts, accuracy, total=0, count=0, average=None):
+    return {
+        "tenant": "t1", "board": GLOBAL_BOARD, "user_id": user_id,
+        "points": 10 * correct + total, "quiz_attempts": attempts, "quiz_correct": correct,
+        "quiz_accuracy": accuracy, "interview_count": count, "interview_score_total": total,
+        "interview_average": average,
+    }
+
+
+def boards():
+    return Leaderboards(FakeDb(FakeUserScores([
+        row("volume", correct=60, attempts=100, accuracy=0.6, total=1000, count=100, average=10.0),
+        row("precise", correct=19, attempts=20, accuracy=0.95, total=300, count=3, average=100.0),
+        row("new", correct=1, attempts=1, accuracy=None, total=100, count=1, average=None),
+    ])))
+
+
+def test_quiz_and_interview_boards_rank_by_ratio_not_volume():
+    async def run():
+        leaderboards = boards()
+        quiz = await leaderboards.leaderboard("t1", GLOBAL_BOARD, "quiz", 10)
+        assert [(e["user_id"], e["rank"], e["value"]) for e in quiz["entries"]] == [("precise", 1, 0.95), ("volume", 2, 0.6)]
+        interview = await leaderboards.leaderboard("t1", GLOBAL_BOARD, "interview", 10)
+        assert [e["user_id"] for e in interview["entries"]] == ["precise", "volume"]
+        overall = await leaderboards.leaderboard("t1", GLOBAL_BOARD, "overall", 10)
+        assert [e["user_id"] for e in overall["entries"]] == ["volume", "precise", "new"]
+
+    asyncio.run(run())
+
+
+def test_users_below_the_minimum_are_unranked():
+    async def run():
+        leaderboards = boards()
+        rank = await leaderboards.rank("t1", "new", GLOBAL_BOARD, "quiz")
+        assert rank["rank"] is None and rank["value"] is None
+        rank = await leaderboards.rank("t1", "volume", GLOBAL_BOARD, "interview")
+        assert rank["rank"] == 2
+        assert rank["interview_average"] == 10.0
+
+    asyncio.run(run())
+
+
+def test_writes_recompute_ratios_after_each_increment():
+    async def run():
+        leaderboards = boards()
+        await leaderboards.record_quiz("t1", "u1", "cse-2026", True)
+        operations, ordered = leaderboards.collection.writes[-1]
+        assert ordered
+        assert [op._doc for op in operations] == [
+            {"$inc": {"quiz_attempts": 1, "quiz_correct": 1, "points": 10}}, DERIVED_FIELDS,
+            {"$inc": {"quiz_attempts": 1, "quiz_correct": 1, "points": 10}}, DERIVED_FIELDS,
+        ]
+        cohort = cohort_board("cse-2026")
+        assert [op._filter["board"] for op in operations] == [GLOBAL_BOARD, GLOBAL_BOARD, cohort, cohort]
+
+    asyncio.run(run())
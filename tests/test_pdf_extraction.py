@@ -0,0 +1,64 @@
+import asyncio
+import io
+import os
+import time
+
+import pytest
+from pypdf import PdfWriter
+
+import pdf_extraction
+from pdf_extraction import ResumeRejected, extract_resume
+
+
+def blank_pdf(pages=1):
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+# Stand-ins for pypdf misbehaving; module level so worker processes can unpickle them
+def hang(content):
+    time.sleep(60)
+
+
+def crash(content):
+    os._exit(1)
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    pdf_extraction.shutdown_pool()
+    yield
+    pdf_extraction.shutdown_pool()
+
+
+def test_extracts_in_a_worker_process():
+    resume = asyncio.run(extract_resume(blank_pdf(2)))
+    assert resume.pages == 2
+    assert resume.use_pdf
+
+
+def test_rejections():
+    with pytest.raises(ResumeRejected):
+        asyncio.run(extract_resume(b""))
+    with pytest.raises(ResumeRejected):
+        asyncio.run(extract_resume(b"not a pdf"))
+    with pytest.raises(ResumeRejected):
+        asyncio.run(extract_resume(blank_pdf(pdf_extraction.MAX_PDF_PAGES + 1)))
+
+
+@pytest.mark.parametrize("misbehave", [hang, crash])
+def test_stuck_or_dead_worker_is_rejected_and_the_pool_replaced(monkeypatch, misbehave):
+    monkeypatch.setattr(pdf_extraction, "EXTRACTION_TIMEOUT_SECONDS", 2)
+    monkeypatch.setattr(pdf_extraction, "_extract", misbehave)
+    started = time.monotonic()
+    with pytest.raises(ResumeRejected):
+        asyncio.run(extract_resume(blank_pdf()))
+    assert time.monotonic() - started < 10
+    assert pdf_extraction._pool is None
+
+    monkeypatch.undo()
+    assert asyncio.run(extract_resume(blank_pdf())).pages == 1
@@ -0,0 +1,131 @@
+import asyncio
+import io
+import json
+from typing import List
+
+from pydantic import BaseModel
+
+from quiz_import import QUESTION_HASH_INDEX, ImportReport, QuizImporter, iter_rows, question_hash
+
+
+class Quiz(BaseModel):
+    question: str
+    options: List[str]
+    correct_answer: int
+    explanation: str
+    category: str
+    difficulty: str
+
+
+def rows(text, fmt):
+    return list(iter_rows(io.BytesIO(text.encode("utf-8-sig")), fmt))
+
+
+def test_csv_numbered_option_columns_in_numeric_order():
+    parsed = rows(
+        "question,option_2,option_10,option_1,option_3,correct_answer\n"
+        "Q?,b,j,a,,1\n",
+        "csv",
+    )
+    assert parsed == [(2, {"question": "Q?", "options": ["a", "b", "j"], "correct_answer": "1"})]
+
+
+def test_csv_options_column_as_pipes_or_json():
+    parsed = rows(
+        'question,options\n'
+        'Pipes?, a | b|c \n'
+        'Json?,"[""x, y"", ""z""]"\n',
+        "csv",
+    )
+    assert [row["options"] for _, row in parsed] == [["a", "b", "c"], ["x, y", "z"]]
+
+
+def test_csv_malformed_options_are_reported_with_their_line():
+    parsed = rows('question,options\nOk?,a|b\nBad?,"[""a"",\n', "csv")
+    assert parsed[0][1]["options"] == ["a", "b"]
+    line_number, error = parsed[1]
+    assert line_number == 3
+    assert isinstance(error, ValueError)
+
+
+def test_jsonl_skips_blank_lines_and_reports_malformed_ones():
+    parsed = rows('{"question": "A?"}\n\n{not json}\n{"question": "B?"}\n', "jsonl")
+    assert [line for line, _ in parsed] == [1, 3, 4]
+    assert isinstance(parsed[1][1], ValueError)
+    assert parsed[2][1] == {"question": "B?"}
+
+
+def quiz(question, **overrides):
+    return {
+        "question": question, "options": ["a", "b"], "correct_answer": 0,
+        "explanation": "", "category": "Python", "difficulty": "Easy", **overrides,
+    }
+
+
+def test_prepare_counts_in_batch_duplicates_and_invalid_rows():
+    importer = QuizImporter(None, Quiz, tenant="t1")
+    report = ImportReport()
+    operations = importer._prepare([
+        (1, quiz("What is a list?")),
+        (2, quiz("  what is a LIST ", category="Basics")),
+        (3, quiz("What is a dict?", correct_answer="first")),
+        (4, ValueError("Expecting value")),
+        (5, {"question": "Missing fields?"}),
+    ], report)
+    assert (report.rows_read, report.duplicates, report.invalid) == (5, 1, 3)
+    assert [error.split(":")[0] for error in report.errors] == ["line 3", "line 4", "line 5"]
+    # The last copy of a duplicated question wins
+    assert len(operations) == 1
+    assert operations[0]._filter == {"tenant": "t1", "question_hash": question_hash("What is a list?")}
+    assert operations[0]._doc["$set"]["category"] == "Basics"
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.docs:
+            raise StopAsyncIteration
+        return self.docs.pop(0)
+
+
+class FakeQuizzes:
+    def __init__(self, indexes):
+        self.indexes = indexes
+        self.calls = []
+
+    async def index_information(self):
+        return dict.fromkeys(self.indexes, {})
+
+    def find(self, *args):
+        self.calls.append("find")
+        return Cursor([{"_id": 1, "question": "Legacy?"}])
+
+    async def bulk_write(self, operations, ordered=True):
+        self.calls.append("bulk_write")
+
+    def aggregate(self, pipeline):
+        self.calls.append("aggregate")
+        return Cursor([])
+
+    async def drop_index(self, name):
+        self.calls.append("drop_index")
+
+    async def create_index(self, keys, **kwargs):
+        self.calls.append("create_index")
+        self.indexes.append(QUESTION_HASH_INDEX)
+
+
+def test_backfill_and_dedupe_run_only_until_the_unique_index_exists():
+    quizzes = FakeQuizzes(["_id_"])
+    importer = QuizImporter(quizzes, Quiz)
+    asyncio.run(importer.ensure_indexes())
+    assert quizzes.calls == ["find", "bulk_write", "aggregate", "drop_index", "create_index"]
+
+    quizzes.calls = []
+    asyncio.run(importer.ensure_indexes())
+    assert quizzes.calls == []
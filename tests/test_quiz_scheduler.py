@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from quiz_scheduler import DAY, INITIAL_EASE, MIN_EASE, RELEARN_SECONDS, Card, QuizScheduler
+
+NOW = 1_700_000_000.0
+
+
+class EmptyCursor:
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        raise StopAsyncIteration
+
+
+class FakeSchedules:
+    def find(self, *args, **kwargs):
+        return EmptyCursor()
+
+
+class FakeDb:
+    quiz_schedules = FakeSchedules()
+
+
+def scheduler(quiz_ids):
+    scheduler = QuizScheduler(FakeDb())
+    scheduler.catalog_reloaded("t1", "quizzes", [{"id": quiz_id} for quiz_id in quiz_ids])
+    return scheduler
+
+
+def test_correct_answers_grow_the_interval():
+    card = Card(NOW)
+    card.review(True, NOW)
+    assert (card.interval, card.repetitions, card.due_at) == (DAY, 1, NOW + DAY)
+    card.review(True, NOW + DAY)
+    assert card.interval == 3 * DAY
+    card.review(True, NOW + 4 * DAY)
+    assert card.interval == pytest.approx(3 * DAY * card.ease)
+    assert card.ease == pytest.approx(INITIAL_EASE)
+    assert card.reviewed_at == NOW + 4 * DAY
+
+
+def test_wrong_answer_resets_and_lowers_ease():
+    card = Card(NOW)
+    for _ in range(3):
+        card.review(True, NOW)
+    card.review(False, NOW)
+    assert (card.interval, card.repetitions, card.due_at) == (RELEARN_SECONDS, 0, NOW + RELEARN_SECONDS)
+    assert card.ease == pytest.approx(INITIAL_EASE - 0.54)
+    for _ in range(10):
+        card.review(False, NOW)
+    assert card.ease == MIN_EASE
+
+
+def test_next_quiz_prefers_due_reviews_then_unseen_then_earliest():
+    async def run():
+        s = scheduler(["a", "b", "c"])
+        order = s.tenants["t1"].quiz_order
+        first, second, third = order
+
+        assert await s.next_quiz("t1", "u1", now=NOW) == first
+        await s.record("t1", "u1", first, correct=False, now=NOW)
+        # The missed question is not due yet, so an unseen one comes next
+        assert await s.next_quiz("t1", "u1", now=NOW + 1) == second
+        # Once due, the review comes before unseen questions
+        assert await s.next_quiz("t1", "u1", now=NOW + RELEARN_SECONDS) == first
+
+        await s.record("t1", "u1", first, correct=True, now=NOW + RELEARN_SECONDS)
+        await s.record("t1", "u1", second, correct=False, now=NOW + RELEARN_SECONDS)
+        await s.record("t1", "u1", third, correct=True, now=NOW + RELEARN_SECONDS)
+        # Nothing due and nothing unseen: the earliest review, skipping the stale heap entry for `first`
+        assert await s.next_quiz("t1", "u1", now=NOW + RELEARN_SECONDS + 1) == second
+
+    asyncio.run(run())
+
+
+def test_next_quiz_skips_removed_quizzes_and_keeps_users_apart():
+    async def run():
+        s = scheduler(["a", "b"])
+        first, second = s.tenants["t1"].quiz_order
+        await s.record("t1", "u1", first, correct=False, now=NOW)
+        s.catalog_changed("t1", "quizzes", {"id": first}, None)
+        assert await s.next_quiz("t1", "u1", now=NOW + RELEARN_SECONDS) == second
+        assert await s.next_quiz("t1", "u2", now=NOW) == second
+        assert await s.next_quiz("t2", "u1", now=NOW) is None
+
+    asyncio.run(run())
@@ -0,0 +1,34 @@
+from resume_history import diff_items
+
+
+def test_exact_matches_ignore_case_and_spacing():
+    diff = diff_items(["Strong  Python skills", "Good formatting"], ["strong python skills", "Clear summary"])
+    assert diff == {"added": ["Clear summary"], "removed": ["Good formatting"], "kept": ["strong python skills"]}
+
+
+def test_reworded_items_are_paired():
+    diff = diff_items(
+        ["Lack of quantified achievements", "No GitHub link"],
+        ["Achievements are not quantified", "Missing LinkedIn profile"],
+    )
+    assert diff["kept"] == ["Achievements are not quantified"]
+    assert diff["removed"] == ["No GitHub link"]
+    assert diff["added"] == ["Missing LinkedIn profile"]
+
+
+def test_each_item_pairs_at_most_once():
+    diff = diff_items(["Python projects"], ["Python projects listed", "More Python projects"])
+    assert len(diff["kept"]) == 1
+    assert len(diff["added"]) == 1
+    assert diff["removed"] == []
+
+
+def test_duplicates_and_empty_lists():
+    assert diff_items(["SQL", "SQL"], ["SQL"]) == {"added": [], "removed": ["SQL"], "kept": ["SQL"]}
+    assert diff_items([], ["Docker"]) == {"added": ["Docker"], "removed": [], "kept": []}
+    assert diff_items(["Docker"], []) == {"added": [], "removed": ["Docker"], "kept": []}
+
+
+def test_stopwords_alone_do_not_make_items_similar():
+    diff = diff_items(["Lack of the tests"], ["Lack of the docs"])
+    assert diff["kept"] == []
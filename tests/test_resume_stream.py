@@ -0,0 +1,62 @@
+import json
+
+from resume_stream import IncrementalJsonParser
+
+ANALYSIS = {
+    "score": 72,
+    "strengths": ["Clear \"impact\" bullets", "Python, SQL"],
+    "weaknesses": ["No summary {section}"],
+    "details": {"format": {"pages": 2, "fonts": ["Arial"]}, "note": "back\\slash"},
+}
+
+
+def feed_in_chunks(text, size):
+    parser = IncrementalJsonParser()
+    events = []
+    for start in range(0, len(text), size):
+        events.extend(parser.feed(text[start:start + size]))
+    return parser, events
+
+
+def test_fields_and_items_survive_every_chunk_size():
+    text = 'Here is the analysis:\n```json\n' + json.dumps(ANALYSIS, indent=2) + '\n```'
+    for size in range(1, 12):
+        parser, events = feed_in_chunks(text, size)
+        assert parser.done
+        assert parser.fields == ANALYSIS
+        items = [(key, value) for kind, key, value in events if kind == "item"]
+        assert items == [
+            ("strengths", ANALYSIS["strengths"][0]),
+            ("strengths", ANALYSIS["strengths"][1]),
+            ("weaknesses", ANALYSIS["weaknesses"][0]),
+        ]
+
+
+def test_structural_characters_inside_strings_are_ignored():
+    text = '{"a": "x, } ] \\" {", "b": [1, "2,]"]}'
+    parser, events = feed_in_chunks(text, 1)
+    assert parser.fields == {"a": 'x, } ] " {', "b": [1, "2,]"]}
+    assert ("item", "b", "2,]") in events
+
+
+def test_escape_split_across_chunks():
+    parser = IncrementalJsonParser()
+    parser.feed('{"a": "one\\')
+    events = parser.feed('"two"}')
+    assert events == [("field", "a", 'one"two')]
+    assert parser.done
+
+
+def test_nested_object_is_a_single_field():
+    parser, events = feed_in_chunks('{"details": {"x": [1, 2], "y": {"z": ","}}, "score": 5}', 3)
+    assert events == [
+        ("field", "details", {"x": [1, 2], "y": {"z": ","}}),
+        ("field", "score", 5),
+    ]
+
+
+def test_text_after_the_object_is_ignored():
+    parser = IncrementalJsonParser()
+    parser.feed('{"score": 1}')
+    assert parser.feed(' {"score": 2}') == []
+    assert parser.fields == {"score": 1}
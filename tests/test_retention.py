@@ -0,0 +1,119 @@
+import asyncio
+import gzip
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import retention
+from retention import RetentionManager, RetentionPolicy
+
+NOW = datetime(2026, 1, 1)
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args):
+        return self
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.docs:
+            raise StopAsyncIteration
+        return self.docs.pop(0)
+
+
+class Result:
+    def __init__(self, deleted_count=0, matched_count=0):
+        self.deleted_count = deleted_count
+        self.matched_count = matched_count
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, batch_size=None):
+        cutoff = query["timestamp"]["$lt"]
+        return Cursor(sorted((d for d in self.docs if d["timestamp"] < cutoff), key=lambda d: d["timestamp"]))
+
+    async def delete_many(self, query):
+        ids = set(query["_id"]["$in"])
+        before = len(self.docs)
+        self.docs = [d for d in self.docs if d["_id"] not in ids]
+        return Result(deleted_count=before - len(self.docs))
+
+
+class FakeState:
+    def __init__(self, renewals=None):
+        self.renewals = renewals
+        self.updates = []
+
+    async def find_one_and_update(self, *args, **kwargs):
+        return {"_id": "status_checks", "owner": retention.WORKER_ID}
+
+    async def update_one(self, query, update):
+        self.updates.append(update["$set"])
+        if "archived_until" in update["$set"]:
+            return Result(matched_count=1)
+        if self.renewals is not None:
+            self.renewals -= 1
+            return Result(matched_count=int(self.renewals >= 0))
+        return Result(matched_count=1)
+
+
+class FakeDb(dict):
+    def __init__(self, collection, state):
+        super().__init__(status_checks=collection)
+        self.retention_state = state
+
+
+def setup(tmp_path, renewals=None):
+    collection = FakeCollection([{"_id": i, "timestamp": NOW - timedelta(days=i)} for i in range(60)])
+    state = FakeState(renewals)
+    manager = RetentionManager(FakeDb(collection, state), tmp_path, [RetentionPolicy(collection="status_checks", days=30)])
+    return manager, collection, state
+
+
+def archived_ids(tmp_path):
+    ids = []
+    for path in (tmp_path / "status_checks").glob("*.jsonl.gz"):
+        with gzip.open(path) as f:
+            ids.extend(json.loads(line)["_id"] for line in f)
+    return sorted(ids)
+
+
+def test_archives_then_deletes_past_retention(tmp_path, monkeypatch):
+    monkeypatch.setattr(retention, "ARCHIVE_CHUNK_SIZE", 7)
+    manager, collection, state = setup(tmp_path)
+    assert asyncio.run(manager.archive(manager.policies[0], NOW)) == 29
+    assert archived_ids(tmp_path) == list(range(31, 60))
+    assert sorted(d["_id"] for d in collection.docs) == list(range(31))
+    # Renewed after each full chunk, then released with the new watermark
+    assert len(state.updates) == 29 // 7 + 1
+    assert state.updates[-1]["archived_until"] == NOW - timedelta(days=30)
+
+
+def test_stops_when_the_lease_is_lost(tmp_path, monkeypatch):
+    monkeypatch.setattr(retention, "ARCHIVE_CHUNK_SIZE", 7)
+    manager, collection, state = setup(tmp_path, renewals=1)
+    assert asyncio.run(manager.archive(manager.policies[0], NOW)) == 14
+    assert archived_ids(tmp_path) == list(range(46, 60))
+    assert len(collection.docs) == 60 - 14
+    assert state.updates[-1]["archived_until"] is None
+
+
+def test_write_failure_deletes_nothing(tmp_path, monkeypatch):
+    manager, collection, _ = setup(tmp_path)
+
+    def fail(path, docs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(retention, "_append_chunk", fail)
+    with pytest.raises(OSError):
+        asyncio.run(manager.archive(manager.policies[0], NOW))
+    assert len(collection.docs) == 60
@@ -0,0 +1,105 @@
+import random
+
+from search import SearchIndex
+
+QUIZZES = [
+    {"id": "q1", "question": "What is a Python decorator?"},
+    {"id": "q2", "question": "Explain JavaScript closures"},
+    {"id": "q3", "question": "How does Python garbage collection work?"},
+]
+ROADMAPS = [
+    {"id": "r1", "role": "Data Engineer", "skills": ["Python", "Spark"], "description": "Pipelines"},
+]
+
+
+def build():
+    index = SearchIndex()
+    index.catalog_reloaded("quizzes", QUIZZES)
+    index.catalog_reloaded("roadmaps", ROADMAPS)
+    return index
+
+
+def ids(results):
+    return {result["id"] for result in results}
+
+
+def test_exact_match_across_collections():
+    index = build()
+    assert ids(index.search("python")) == {"q1", "q3", "r1"}
+    assert ids(index.search("python", collections=["roadmaps"])) == {"r1"}
+
+
+def test_prefix_matches_rank_below_exact_matches():
+    index = build()
+    assert ids(index.search("decor")) == {"q1"}
+    assert ids(index.search("garb coll")) == {"q3"}
+    index.add("quizzes", {"id": "q4", "question": "Closure versus closures"})
+    results = index.search("closure")
+    assert results[0]["id"] == "q4"
+    assert ids(results) == {"q2", "q4"}
+
+
+def test_single_typo_is_tolerated():
+    index = build()
+    assert ids(index.search("pyhton")) == {"q1", "q3", "r1"}  # transposition
+    assert ids(index.search("closurs")) == {"q2"}  # deletion
+    assert ids(index.search("javascriptt")) == {"q2"}  # insertion
+    assert index.search("pythno garbagge") != []
+    assert index.search("zzzz") == []
+
+
+def test_short_tokens_are_not_typo_matched():
+    index = build()
+    assert index.search("spk") == []
+    assert ids(index.search("sprk")) == {"r1"}
+
+
+def test_remove_drops_terms_no_other_document_uses():
+    index = build()
+    index.remove("quizzes", "q1")
+    assert len(index) == 3
+    assert index.search("decorator") == []
+    assert index.search("decorater") == []
+    assert "decorator" not in index.vocabulary
+    assert ids(index.search("python")) == {"q3", "r1"}
+
+
+def test_catalog_changes_update_only_affected_documents():
+    index = build()
+    index.catalog_changed("quizzes", QUIZZES[1], {"id": "q2", "question": "Explain Rust ownership"})
+    assert index.search("closures") == []
+    assert ids(index.search("ownership")) == {"q2"}
+
+    index.catalog_reloaded("quizzes", QUIZZES[:1])
+    assert ids(index.search("python")) == {"q1", "r1"}
+    assert index.search("rust") == []
+    assert index.total_length == sum(index.doc_lengths.values())
+
+
+def test_early_exit_returns_the_exhaustive_top_results():
+    random.seed(7)
+    words = ["what", "is", "a", "stack", "queue", "react", "reactive", "hooks", "heap", "sort", "graph", "tree"]
+    index = SearchIndex()
+    for n in range(400):
+        text = " ".join(random.choices(words, weights=range(len(words), 0, -1), k=random.randint(3, 15)))
+        index.add("quizzes", {"id": str(n), "question": text})
+    for n in range(0, 400, 3):
+        index.remove("quizzes", str(n))
+
+    for query in ["what is a stack", "react hooks", "reac", "a", "stak heap", "tree graph sort queue"]:
+        results = index.search(query, limit=10)
+        # With room for every document nothing can be cut off early
+        everything = index.search(query, limit=len(index))
+        assert len(everything) > 10
+        assert [round(r["score"], 4) for r in results] == [round(r["score"], 4) for r in everything[:10]]
+
+
+
+def test_stopwords_and_short_prefixes():
+    index = build()
+    index.add("quizzes", {"id": "q4", "question": "What is a stack?"})
+    # Function words are dropped when the query has other words
+    assert ids(index.search("what is a stack")) == {"q4"}
+    assert ids(index.search("what is")) == {"q1", "q4"}
+    # Too short to expand: only exact matches
+    assert index.search("py") == []
@@ -0,0 +1,82 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+
+import tenancy
+from catalog_cache import CatalogCache
+from tenancy import PerTenant, TenantLRU, get_tenant
+
+
+def test_lru_evicts_least_recently_used():
+    evicted = []
+    lru = TenantLRU(2, on_evict=lambda tenant, value: evicted.append((tenant, value)))
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+    assert evicted == [("b", 2)]
+    assert list(lru) == ["a", "c"]
+    # peek() is not a use
+    lru.peek("a")
+    lru.set("d", 4)
+    assert evicted[-1] == ("a", 1)
+
+
+def test_lru_never_evicts_pinned_tenants_or_the_one_being_set():
+    pinned = {"a", "b"}
+    lru = TenantLRU(1, pinned=lambda tenant, value: tenant in pinned)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert sorted(lru) == ["a", "b"]
+    lru.set("c", 3)
+    assert sorted(lru) == ["a", "b", "c"]
+    pinned.clear()
+    lru.set("d", 4)
+    assert list(lru) == ["d"]
+
+
+class Listener:
+    def __init__(self):
+        self.loaded = {}
+
+    def catalog_reloaded(self, collection, documents):
+        self.loaded[collection] = len(documents)
+
+    def catalog_changed(self, collection, old, new):
+        pass
+
+
+def test_per_tenant_listeners_follow_cache_eviction():
+    listeners = PerTenant(Listener)
+    cache = CatalogCache(None, collections=("quizzes",), max_tenants=2)
+    cache.add_listener(listeners)
+    for tenant in ("t1", "t2", "t3"):
+        cache._reloaded(tenant, "quizzes", [{"_id": 1, "id": "q1", "tenant": tenant}])
+        cache._partition(tenant, "quizzes").loaded_at = time.monotonic()
+
+    assert sorted(listeners.tenants) == ["t2", "t3"]
+    assert listeners["t3"].loaded == {"quizzes": 1}
+    # Unloaded tenants get an empty instance that is not kept
+    assert listeners["t1"].loaded == {}
+    assert "t1" not in listeners.tenants
+
+
+def test_degraded_tenants_are_pinned_in_the_cache():
+    cache = CatalogCache(None, collections=("quizzes",), max_tenants=1)
+    cache._reloaded("t1", "quizzes", [])
+    cache.degraded.add(("t1", "quizzes"))
+    cache._reloaded("t2", "quizzes", [])
+    assert sorted(cache._tenants) == ["t1", "t2"]
+
+
+def test_get_tenant_validates_the_header(monkeypatch):
+    monkeypatch.setattr(tenancy, "TENANTS", [tenancy.DEFAULT_TENANT, "iit-b"])
+    assert get_tenant(None) == tenancy.DEFAULT_TENANT
+    assert get_tenant(" IIT-B ") == "iit-b"
+    with pytest.raises(HTTPException) as e:
+        get_tenant("../etc")
+    assert e.value.status_code == 400
+    with pytest.raises(HTTPException) as e:
+        get_tenant("other")
+    assert e.value.status_code == 404